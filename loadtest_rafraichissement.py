@@ -0,0 +1,394 @@
+"""Test de charge : coût réseau du rafraîchissement de la page selon la stratégie de diffusion.
+
+Simule des milliers de clients "headless" qui suivent la logique de rafraîchissement
+émise dans la page, contre des doublures locales des trois API (Blockstream, CoinGecko,
+Blockchain.info). Le temps est compressé par --speed (600 = 10 min simulées par seconde).
+
+Stratégies comparées :
+- polling : ancienne logique de la page (3 setTimeout à 10 s puis updateData toutes
+  les 10 min, 3 requêtes séquentielles ; chaque changement de shareSelect retélécharge
+  le hash rate) ;
+- adaptive : planificateur actuel de la page (hauteur selon le temps depuis le dernier
+  bloc, horodatage du bloc seulement quand la hauteur change, prix selon la volatilité,
+  hash rate toutes les heures). Onglets visibles par défaut, comme les autres
+  stratégies ; --hidden 0.5 simule des onglets en arrière-plan la moitié du temps
+  (seul ce planificateur suspend alors ses requêtes) ;
+- cache : logique polling, mais via un proxy qui met en cache chaque API (TTL) ;
+- sse : mode serve du module, un seul poller amont et diffusion Server-Sent Events.
+
+Exemple : python loadtest_rafraichissement.py --clients 2000 --duration 3600 --speed 600
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from model_gaspillage_btc_france import (HASH_RATE_POLL_S, HEIGHT_POLL_S, PRICE_POLL_S, LiveState,
+                                         _handle_client)
+
+UPDATE_INTERVAL_S = 600  # setInterval(updateData, 600000)
+STARTUP_DELAY_S = 10  # Les 3 setTimeout(updateData, 10000)
+API_PATHS = ('/blocks/tip/height', '/simple/price', '/charts/hash-rate')
+BLOCKS_FROM_PATH = '/blocks/:height'  # Blocs depuis une hauteur, avec horodatage (planificateur adaptatif)
+
+def stats_key(path):
+    """Chemin regroupé pour les compteurs (/blocks/916945 -> /blocks/:height)."""
+    if path.startswith('/blocks/') and path[len('/blocks/'):].isdigit():
+        return BLOCKS_FROM_PATH
+    return path
+
+class Stats:
+    """Compteurs de requêtes, d'octets et de latences (en secondes réelles)."""
+
+    def __init__(self):
+        self.requests = dict.fromkeys(API_PATHS + (BLOCKS_FROM_PATH,), 0)
+        self.bytes = 0
+        self.errors = 0
+        self.latencies = []
+
+    def percentile(self, q):
+        if not self.latencies:
+            return float('nan')
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+class StandIn:
+    """Doublures locales des trois API, avec une latence amont simulée."""
+
+    def __init__(self, speed, latency_s):
+        self.speed = speed
+        self.latency_s = latency_s
+        self.stats = Stats()
+        self.height = 916944
+        self.tip_time = time.perf_counter() * speed  # Horodatage du dernier bloc, en secondes simulées
+        hash_values = [{'x': 1700000000 + i * 86400, 'y': 6e8 + i * 1e6} for i in range(365)]
+        self.hash_rate = json.dumps({'values': hash_values}).encode()
+
+    async def next_blocks(self):
+        """Nouveaux blocs selon un processus de Poisson (10 min en moyenne)."""
+        while True:
+            await asyncio.sleep(random.expovariate(1 / UPDATE_INTERVAL_S) / self.speed)
+            self.height += 1
+            self.tip_time = time.perf_counter() * self.speed
+
+    def body(self, path):
+        if path == API_PATHS[0]:
+            return str(self.height).encode()
+        if stats_key(path) == BLOCKS_FROM_PATH:
+            # 10 blocs à partir de la hauteur demandée, comme Esplora (champs principaux, taille réaliste)
+            start = min(int(path.rsplit('/', 1)[1]), self.height)
+            return json.dumps([{'id': '0' * 64, 'height': start - i,
+                                'timestamp': self.tip_time - (self.height - start + i) * UPDATE_INTERVAL_S,
+                                'tx_count': 3000,
+                                'size': 1500000, 'weight': 3990000, 'merkle_root': 'f' * 64,
+                                'previousblockhash': '0' * 64, 'mediantime': self.tip_time, 'nonce': 0,
+                                'bits': 386000000, 'difficulty': 1.2e14, 'version': 536870912}
+                               for i in range(10)]).encode()
+        if path == API_PATHS[1]:
+            return json.dumps({'bitcoin': {'eur': 97304 + random.uniform(-500, 500)}}).encode()
+        return self.hash_rate
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            path = request_line.decode('latin-1').split()[1]
+            await asyncio.sleep(self.latency_s)
+            body = self.body(path)
+            self.stats.requests[stats_key(path)] += 1
+            self.stats.bytes += len(body)
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                         + body)
+            await writer.drain()
+        except (ConnectionError, IndexError, KeyError):
+            pass
+        finally:
+            writer.close()
+
+def tracked(handler, tasks):
+    """Enregistre les connexions serveur pour les annuler proprement en fin de scénario."""
+    async def wrapper(reader, writer):
+        tasks.add(asyncio.current_task())
+        try:
+            await handler(reader, writer)
+        except asyncio.CancelledError:
+            writer.close()
+        finally:
+            tasks.discard(asyncio.current_task())
+    return wrapper
+
+async def http_get(port, path):
+    """GET minimal HTTP/1.1 sur localhost ; renvoie le corps de la réponse."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    _, separator, body = response.partition(b'\r\n\r\n')
+    if not separator:
+        raise ConnectionError("réponse incomplète")
+    return body
+
+async def polling_client(port, stats, speed, share_changes_per_hour):
+    """Client qui rejoue la logique de la page : updateData = 3 requêtes séquentielles."""
+    async def update_data():
+        start = time.perf_counter()
+        try:
+            for path in API_PATHS:
+                body = await http_get(port, path)
+                stats.bytes += len(body)
+                stats.requests[path] += 1
+        except OSError:
+            stats.errors += 1  # La page garde alors les dernières valeurs connues
+            return
+        stats.latencies.append(time.perf_counter() - start)
+
+    async def share_select():
+        while share_changes_per_hour > 0:
+            await asyncio.sleep(random.expovariate(share_changes_per_hour / 3600) / speed)
+            try:
+                body = await http_get(port, API_PATHS[2])
+            except OSError:
+                stats.errors += 1
+                continue
+            stats.bytes += len(body)
+            stats.requests[API_PATHS[2]] += 1
+
+    changes = asyncio.create_task(share_select())
+    try:
+        await asyncio.sleep(STARTUP_DELAY_S / speed)
+        await asyncio.gather(update_data(), update_data(), update_data())
+        while True:
+            await asyncio.sleep(UPDATE_INTERVAL_S / speed)
+            await update_data()
+    finally:
+        changes.cancel()
+
+async def adaptive_client(port, stats, speed, hidden_fraction):
+    """Client qui rejoue le planificateur adaptatif émis dans la page (POLL_TASKS)."""
+    last_height = None
+    last_block = None
+    last_price = None
+    volatility = 0.005
+    hidden = False
+    visible = asyncio.Event()
+    visible.set()
+
+    async def visibility():
+        """Alterne onglet visible / masqué (masqué `hidden_fraction` du temps, périodes ~30 min)."""
+        nonlocal hidden
+        while 0 < hidden_fraction < 1:
+            hidden = random.random() < hidden_fraction
+            if hidden:
+                visible.clear()
+            else:
+                visible.set()
+            await asyncio.sleep(random.expovariate(1 / 1800) / speed)
+
+    async def fetch(path):
+        start = time.perf_counter()
+        body = await http_get(port, path)
+        stats.bytes += len(body)
+        stats.requests[stats_key(path)] += 1
+        stats.latencies.append(time.perf_counter() - start)
+        return body
+
+    async def height():
+        nonlocal last_height, last_block
+        height = int(await fetch(API_PATHS[0]))
+        if last_block is None or height > last_height:
+            # Horodatage du bloc (pas date de détection), demandé seulement au changement
+            last_block = json.loads(await fetch(f"/blocks/{height}"))[0]['timestamp']
+        last_height = height
+        since_block = time.perf_counter() * speed - last_block
+        return min(1800, max(600, 3 * UPDATE_INTERVAL_S - since_block))
+
+    async def price():
+        nonlocal last_price, volatility
+        new_price = json.loads(await fetch(API_PATHS[1]))['bitcoin']['eur']
+        if last_price is not None:
+            volatility = 0.7 * volatility + 0.3 * abs(new_price - last_price) / last_price
+        last_price = new_price
+        return 600 + (1 - min(1, volatility / 0.01)) * (1800 - 600)
+
+    async def hash_rate():
+        await fetch(API_PATHS[2])
+        return 3600
+
+    async def loop(task):
+        await asyncio.sleep(5 / speed)
+        while True:
+            if hidden:
+                await visible.wait()  # Aucun poll onglet masqué, rattrapage au retour
+            try:
+                delay = await task()
+            except OSError:
+                stats.errors += 1
+                delay = 300
+            await asyncio.sleep(delay / speed)
+
+    if hidden_fraction >= 1:
+        hidden = True
+        visible.clear()
+    await asyncio.gather(visibility(), loop(height), loop(price), loop(hash_rate))
+
+async def start_cache_proxy(upstream_port, ttl_s, speed, connections):
+    """Proxy qui sert la dernière réponse de chaque API tant qu'elle a moins de ttl_s (simulées)."""
+    cache = {}
+
+    async def handle(reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            path = request_line.decode('latin-1').split()[1]
+            entry = cache.get(path)
+            if entry is None or time.monotonic() - entry[0] > ttl_s / speed:
+                # Un seul fetch amont par entrée expirée, même si mille clients arrivent ensemble
+                future = asyncio.ensure_future(http_get(upstream_port, path))
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())  # Erreur relue par les clients
+                entry = cache[path] = (time.monotonic(), future)
+            body = await asyncio.shield(entry[1])
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                         + body)
+            await writer.drain()
+        except (OSError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(tracked(handle, connections), '127.0.0.1', 0, backlog=4096)
+
+async def sse_client(port, stats, published):
+    """Client EventSource : mesure le délai entre publication serveur et réception."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+    first = True  # Le premier événement est l'état courant envoyé à la connexion
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            stats.bytes += len(line)
+            if line.startswith(b'id: '):
+                version = int(line[4:])
+                if first:
+                    first = False
+                elif version in published:
+                    stats.latencies.append(time.perf_counter() - published[version])
+    finally:
+        writer.close()
+
+async def sse_server(upstream_port, speed, connections):
+    """Serveur du mode serve (même gestionnaire de connexion) alimenté par les doublures."""
+    state = LiveState(916944, 97304, 18000.0)
+    published = {}
+    page = {'html': b'<html></html>'}
+
+    async def poll(interval, path, publish):
+        while True:
+            try:
+                publish(await http_get(upstream_port, path))
+                published.setdefault(state.version, time.perf_counter())
+            except OSError:
+                pass  # Comme _poll : on réessaie au prochain intervalle
+            await asyncio.sleep(interval / speed)
+
+    def on_height(body):
+        height = int(body)
+        if height > state.data['height']:
+            state.publish(height=height)
+
+    def on_hash_rate(body):
+        values = json.loads(body)['values']
+        state.publish(total_mw=values[-1]['y'] * 30 / 1_000_000)
+
+    pollers = [
+        asyncio.create_task(poll(HEIGHT_POLL_S, API_PATHS[0], on_height)),
+        asyncio.create_task(poll(PRICE_POLL_S, API_PATHS[1],
+                                 lambda body: state.publish(price=json.loads(body)['bitcoin']['eur']))),
+        asyncio.create_task(poll(HASH_RATE_POLL_S, API_PATHS[2], on_hash_rate)),
+    ]
+    server = await asyncio.start_server(tracked(lambda r, w: _handle_client(r, w, state, page), connections),
+                                        '127.0.0.1', 0, backlog=4096)
+    return server, pollers, published
+
+async def run(strategy, clients, duration_s, speed, ramp_s, latency_s, share_changes_per_hour, cache_ttl_s,
+              hidden_fraction):
+    """Exécute un scénario ; renvoie (stats amont, stats clients)."""
+    stand_in = StandIn(speed, latency_s)
+    connections = set()
+    upstream = await asyncio.start_server(tracked(stand_in.handle, connections), '127.0.0.1', 0, backlog=4096)
+    upstream_port = upstream.sockets[0].getsockname()[1]
+    background = [asyncio.create_task(stand_in.next_blocks())]
+    client_stats = Stats()
+    servers = [upstream]
+
+    if strategy in ('polling', 'adaptive'):
+        port = upstream_port
+    elif strategy == 'cache':
+        proxy = await start_cache_proxy(upstream_port, cache_ttl_s, speed, connections)
+        servers.append(proxy)
+        port = proxy.sockets[0].getsockname()[1]
+    else:
+        server, pollers, published = await sse_server(upstream_port, speed, connections)
+        servers.append(server)
+        background += pollers
+        port = server.sockets[0].getsockname()[1]
+
+    async def client():
+        await asyncio.sleep(random.uniform(0, ramp_s) / speed)  # Ouvertures de page étalées
+        if strategy == 'sse':
+            await sse_client(port, client_stats, published)
+        elif strategy == 'adaptive':
+            await adaptive_client(port, client_stats, speed, hidden_fraction)
+        else:
+            await polling_client(port, client_stats, speed, share_changes_per_hour)
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await asyncio.sleep(duration_s / speed)
+    for server in servers:
+        server.close()
+    pending = tasks + background + list(connections)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return stand_in.stats, client_stats
+
+def report(strategy, upstream, client_stats, duration_s):
+    hours = duration_s / 3600
+    total = sum(upstream.requests.values())
+    print(f"\n== {strategy} ==")
+    print(f"  Requêtes amont      : {total} ({total / hours:.0f}/h simulée) "
+          + ", ".join(f"{p} {n}" for p, n in upstream.requests.items()))
+    print(f"  Octets amont        : {upstream.bytes / 1e6:.2f} Mo ({upstream.bytes / hours / 1e6:.2f} Mo/h)")
+    print(f"  Octets vers clients : {client_stats.bytes / 1e6:.2f} Mo, erreurs client : {client_stats.errors}")
+    label = {'sse': "livraison SSE", 'adaptive': "requête"}.get(strategy, "cycle updateData")
+    print(f"  Latence {label} (s réelles) : p50 {client_stats.percentile(50):.3f}, "
+          f"p95 {client_stats.percentile(95):.3f}, p99 {client_stats.percentile(99):.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des stratégies de rafraîchissement")
+    parser.add_argument('--strategies', default='polling,adaptive,cache,sse')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=3600, help="Durée simulée (s)")
+    parser.add_argument('--speed', type=float, default=600, help="Facteur de compression du temps")
+    parser.add_argument('--ramp', type=float, default=600, help="Étalement des ouvertures de page (s simulées)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Latence amont simulée (s réelles)")
+    parser.add_argument('--share-changes', type=float, default=0.5,
+                        help="Changements de shareSelect par client et par heure")
+    parser.add_argument('--cache-ttl', type=float, default=60, help="TTL du proxy cache (s simulées)")
+    parser.add_argument('--hidden', type=float, default=0,
+                        help="Part du temps où l'onglet est en arrière-plan (stratégie adaptive seulement ; "
+                             "l'ancien setInterval continue de tourner onglet masqué)")
+    args = parser.parse_args()
+    for strategy in args.strategies.split(','):
+        upstream, client_stats = asyncio.run(run(strategy, args.clients, args.duration, args.speed, args.ramp,
+                                                 args.latency, args.share_changes, args.cache_ttl, args.hidden))
+        report(strategy, upstream, client_stats, args.duration)
+
+if __name__ == "__main__":
+    main()
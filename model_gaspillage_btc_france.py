@@ -1,36 +1,72 @@
-import requests
+import argparse
+import asyncio
+import base64
+import codecs
+import csv
+import html
 import json
-from datetime import date, datetime
+import math
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from itertools import accumulate
+from operator import mul
 import time
+import uuid
 
-def get_current_block_height():
-    """Récupère la hauteur de bloc actuelle du Bitcoin."""
+GENESIS_TS = 1231027200  # 03/01/2009 00:00 UTC
+
+def get_current_block_height(strict=False):
+    """Récupère la hauteur de bloc actuelle du Bitcoin (strict : lève l'erreur au lieu du fallback)."""
+    import requests  # Import paresseux : inutile pour les calculs sur données en cache
     try:
         response = requests.get("https://blockstream.info/api/blocks/tip/height")
         return int(response.text)
     except Exception as e:
+        if strict:
+            raise
         print(f"Erreur lors de la récupération de la hauteur de bloc : {e}")
         return 916944  # Fallback pour 29/09/2025
 
-def get_btc_price_eur():
+def get_btc_price_eur(strict=False):
     """Récupère le prix actuel du BTC en EUR via CoinGecko API."""
+    import requests  # Import paresseux : inutile pour les calculs sur données en cache
     try:
         response = requests.get("https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=eur")
         return response.json()["bitcoin"]["eur"]
     except Exception as e:
+        if strict:
+            raise
         print(f"Erreur lors de la récupération du prix : {e}")
         return 97304  # Fallback pour 29/09/2025
 
-def get_current_hash_rate_ths():
-    """Récupère le hash rate actuel en TH/s via Blockchain.info API."""
+def get_hash_rate_series(strict=False):
+    """Récupère la série du hash rate en TH/s via Blockchain.info API."""
+    import requests  # Import paresseux : inutile pour les calculs sur données en cache
     try:
         response = requests.get("https://api.blockchain.info/charts/hash-rate?format=json")
         data = response.json()
-        hr_ths = data['values'][-1]['y']
-        return hr_ths
+        series = TimeSeries()
+        for point in data['values']:
+            series.append(point['x'], point['y'])
+        return series
     except Exception as e:
+        if strict:
+            raise
         print(f"Erreur lors de la récupération du hash rate : {e}")
-        return 600000000  # Fallback approx 600 EH/s = 6e8 TH/s
+        return TimeSeries([time.time()], [600000000])  # Fallback approx 600 EH/s = 6e8 TH/s
+
+def get_current_hash_rate_ths(strict=False):
+    """Récupère le hash rate actuel en TH/s via Blockchain.info API."""
+    return get_hash_rate_series(strict=strict).last()
+
+def hash_rate_to_mw(hr_ths, eff=30):
+    """Puissance moyenne du réseau en MW pour un hash rate en TH/s (eff en J/TH)."""
+    return hr_ths * eff / 1_000_000
 
 def days_since_genesis(current_date=None):
     """Calcule les jours depuis la genèse (03/01/2009)."""
@@ -39,38 +75,305 @@ def days_since_genesis(current_date=None):
         current_date = date.today()
     return (current_date - genesis).days
 
-def get_historical_prices(current_date):
-    """Récupère les prix historiques BTC en EUR depuis 2018, échantillonné tous les 7 jours pour hebdomadaire."""
-    from_ts = 1514764800  # 2018-01-01
+def fractional_years(timestamps):
+    """Convertit des timestamps unix (s) croissants en années fractionnaires, ex. 2025.74.
+
+    Les bornes de l'année courante sont calculées une fois par année traversée ;
+    chaque point ne coûte ensuite qu'une soustraction et une division entière.
+    """
+    out = []
+    year = year_start = year_end = None
+    for ts in timestamps:
+        if year is None or not (year_start <= ts < year_end):
+            year = datetime.fromtimestamp(ts, timezone.utc).year
+            year_start = datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+            year_end = datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp()
+        out.append(year + ((ts - year_start) // 86400) / 365.25)
+    return out
+
+RESAMPLE_SECONDS = {'day': 86400, 'week': 7 * 86400}
+
+def time_bucket(ts, rule):
+    """Numéro de période UTC ('day', 'week' du lundi ou 'month') contenant le timestamp ts."""
+    if rule == 'month':
+        dt = datetime.fromtimestamp(ts, timezone.utc)
+        return dt.year * 12 + dt.month - 1
+    if rule == 'week':
+        return (ts - 4 * 86400) // RESAMPLE_SECONDS['week']  # Semaines du lundi (01/01/1970 = jeudi)
+    return ts // RESAMPLE_SECONDS[rule]
+
+def time_bucket_start(bucket, rule):
+    """Timestamp de début de la période renvoyée par time_bucket."""
+    if rule == 'month':
+        return datetime(bucket // 12, bucket % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+    if rule == 'week':
+        return bucket * RESAMPLE_SECONDS['week'] + 4 * 86400
+    return bucket * RESAMPLE_SECONDS[rule]
+
+class TimeSeries:
+    """Série temporelle en colonnes : timestamps unix (s) et valeurs en float64.
+
+    16 octets par point au lieu d'un dict {'x', 'y'} de floats boxés. Les
+    timestamps sont triés, d'où des tranches et recherches en O(log n) ; les
+    tranches sont des vues (memoryview) sans copie sur les mêmes buffers, en
+    lecture seule (copy() pour une série modifiable).
+    Sert pour les prix, le hash rate et les hauteurs de bloc.
+    """
+
+    def __init__(self, timestamps=(), values=()):
+        if isinstance(timestamps, memoryview):
+            self.t = timestamps
+            self.v = values
+        else:
+            self.t = array('d', timestamps)
+            self.v = array('d', values)
+        if len(self.t) != len(self.v):
+            raise ValueError("timestamps et valeurs de longueurs différentes")
+
+    def __len__(self):
+        return len(self.t)
+
+    def __iter__(self):
+        return zip(self.t, self.v)
+
+    def append(self, ts, value):
+        """Ajoute un point en fin de série (timestamps croissants)."""
+        if isinstance(self.t, memoryview):
+            raise TypeError("vue en lecture seule : utiliser copy() pour ajouter des points")
+        if len(self.t) and ts < self.t[-1]:
+            raise ValueError("timestamp antérieur au dernier point")
+        self.t.append(ts)
+        self.v.append(value)
+
+    def copy(self):
+        """Copie indépendante et modifiable (y compris depuis une vue)."""
+        return TimeSeries(self.t.tolist(), self.v.tolist())
+
+    def first(self):
+        return self.v[0]
+
+    def last(self):
+        return self.v[-1]
+
+    def view(self, start=0, stop=None):
+        """Vue sans copie sur les indices [start, stop)."""
+        t = memoryview(self.t)[start:stop]
+        v = memoryview(self.v)[start:stop]
+        return TimeSeries(t, v)
+
+    def slice(self, t0=None, t1=None):
+        """Vue sans copie des points avec t0 <= t < t1, en O(log n)."""
+        start = 0 if t0 is None else bisect_left(self.t, t0)
+        stop = len(self.t) if t1 is None else bisect_left(self.t, t1)
+        return self.view(start, stop)
+
+    def asof(self, ts, default=None):
+        """Dernière valeur connue à l'instant ts (t_i <= ts)."""
+        i = bisect_right(self.t, ts)
+        return self.v[i - 1] if i else default
+
+    def resample(self, rule='week', how='last'):
+        """Rééchantillonne par 'day', 'week' ou 'month' ('last', 'first' ou 'mean')."""
+        if rule not in ('day', 'week', 'month'):
+            raise ValueError(f"Règle de rééchantillonnage inconnue : {rule}")
+        out = TimeSeries()
+        current = None
+        acc = []
+        for ts, value in self:
+            bucket = time_bucket(ts, rule)
+            if bucket != current and acc:
+                out.append(time_bucket_start(current, rule), self._aggregate(acc, how))
+                acc = []
+            current = bucket
+            acc.append(value)
+        if acc:
+            out.append(time_bucket_start(current, rule), self._aggregate(acc, how))
+        return out
+
+    @staticmethod
+    def _aggregate(values, how):
+        if how == 'last':
+            return values[-1]
+        if how == 'first':
+            return values[0]
+        if how == 'mean':
+            return sum(values) / len(values)
+        raise ValueError(f"Agrégation inconnue : {how}")
+
+    def fractional_years(self):
+        """Timestamps convertis en années fractionnaires."""
+        return fractional_years(self.t)
+
+class PowerLawFit:
+    """Régression des moindres carrés en log(jours)/log(prix), mise à jour en ligne.
+
+    Seules les sommes courantes sont conservées : chaque nouveau prix journalier
+    met à jour l'ajustement en O(1), sans refaire la régression sur tout l'historique.
+    Modèle : ln(P) = ln(A) + exposant * ln(t), t = jours depuis la genèse.
+    """
+
+    MIN_POINTS = 30  # En dessous, l'ajustement est jugé trop instable
+
+    def __init__(self):
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+        self.sum_yy = 0.0
+
+    def add(self, days, price):
+        """Ajoute un point (jours depuis genèse, prix) aux sommes courantes."""
+        if days <= 0 or price <= 0:
+            return
+        x = math.log(days)
+        y = math.log(price)
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+        self.sum_yy += y * y
+
+    def add_timestamp(self, ts_ms, price):
+        """Ajoute un point CoinGecko (timestamp en ms, prix)."""
+        self.add((ts_ms / 1000 - GENESIS_TS) / 86400, price)
+
+    def is_ready(self):
+        return self.n >= self.MIN_POINTS and self._sxx() > 0
+
+    def _sxx(self):
+        return self.sum_xx - self.sum_x * self.sum_x / self.n if self.n else 0.0
+
+    @property
+    def exponent(self):
+        """Pente de la régression (exposant de la loi de puissance)."""
+        return (self.sum_xy - self.sum_x * self.sum_y / self.n) / self._sxx()
+
+    @property
+    def intercept(self):
+        """Ordonnée à l'origine ln(A)."""
+        return (self.sum_y - self.exponent * self.sum_x) / self.n
+
+    @property
+    def A(self):
+        return math.exp(self.intercept)
+
+    def residual_std(self):
+        """Écart type des résidus en log-prix (n - 2 degrés de liberté)."""
+        if self.n <= 2:
+            return 0.0
+        syy = self.sum_yy - self.sum_y * self.sum_y / self.n
+        sse = max(0.0, syy - self.exponent ** 2 * self._sxx())
+        return math.sqrt(sse / (self.n - 2))
+
+    def band(self, days, z=1.96):
+        """Bande de prédiction (bas, haut) à ~95% autour du prix ajusté."""
+        x = math.log(days)
+        mean_x = self.sum_x / self.n
+        se = self.residual_std() * math.sqrt(1 + 1 / self.n + (x - mean_x) ** 2 / self._sxx())
+        center = self.intercept + self.exponent * x
+        return math.exp(center - z * se), math.exp(center + z * se)
+
+_PAIR_RE = re.compile(r'[\s,]*\[\s*(-?[\d.eE+-]+)\s*,\s*(-?[\d.eE+-]+|null)\s*\]')
+
+def iter_json_pairs(chunks, key='prices'):
+    """Extrait au fil de l'eau les paires [ts, valeur] du tableau `key` d'un flux JSON.
+
+    `chunks` est un itérable d'octets (ex. response.iter_content()). Seul un petit
+    tampon est conservé : la réponse complète n'est jamais en mémoire. La lecture
+    s'arrête dès la fin du tableau (les autres clés ne sont pas lues).
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    marker = f'"{key}"'
+    buffer = ''
+    inside = False
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if not inside:
+            start = buffer.find(marker)
+            if start < 0:
+                buffer = buffer[-len(marker):]  # Le marqueur peut être coupé entre deux blocs
+                continue
+            bracket = buffer.find('[', start + len(marker))
+            if bracket < 0:
+                buffer = buffer[start:]
+                continue
+            buffer = buffer[bracket + 1:]
+            inside = True
+        pos = 0
+        while True:
+            match = _PAIR_RE.match(buffer, pos)
+            if not match:
+                break
+            if match.group(2) != 'null':
+                yield float(match.group(1)), float(match.group(2))
+            pos = match.end()
+        buffer = buffer[pos:]
+        if buffer.lstrip(' \n\r\t,').startswith(']'):
+            return
+
+HISTORY_START_TS = 1514764800  # 2018-01-01 : fenêtre du graphique et du compteur
+
+def get_historical_prices(current_date, resample='day', strict=False, from_ts=HISTORY_START_TS):
+    """Récupère les prix historiques BTC en EUR depuis `from_ts` (2018 par défaut, série journalière).
+
+    Le tableau `prices` est lu en flux et agrégé à la volée (dernier prix de chaque
+    jour, ou 'week' / 'month') : la mémoire reste bornée même avec un historique
+    à la minute.
+    """
+    import requests
     to_ts = int(time.mktime(current_date.timetuple()))
     try:
         url = f"https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range?vs_currency=eur&from={from_ts}&to={to_ts}"
-        response = requests.get(url)
-        data = response.json()['prices']
-        points = []
-        for i in range(0, len(data), 7):  # Échantillon tous les 7 jours pour hebdomadaire
-            ts_ms, p = data[i]
-            dt = datetime.fromtimestamp(ts_ms / 1000).date()
-            fractional_year = dt.year + ((dt.timetuple().tm_yday - 1) / 365.25)
-            points.append({'x': fractional_year, 'y': p})
-        return points
+        response = requests.get(url, stream=True)
+        series = TimeSeries()
+        bucket = last = None
+        with response:
+            for ts_ms, p in iter_json_pairs(response.iter_content(chunk_size=65536)):
+                ts = ts_ms / 1000
+                current = time_bucket(ts, resample)
+                if bucket is not None and current != bucket:
+                    series.append(*last)
+                bucket, last = current, (ts, p)
+        if last is not None:
+            series.append(*last)
+        if not len(series):
+            raise ValueError("aucun prix dans la réponse")
+        return series
     except Exception as e:
+        if strict:
+            raise
         print(f"Erreur hist: {e}")
-        return [{'x': 2018.0, 'y': 10000}, {'x': 2025.0, 'y': 97000}]  # Dummy fallback
+        return TimeSeries([HISTORY_START_TS, 1735689600], [10000, 97000])  # Dummy fallback (2018 -> 2025)
 
-def get_power_law_points(current_date, exponent=5.6, years_ahead=5):
-    """Génère des points pour la courbe de loi de puissance."""
+def get_power_law_points(current_date, price_eur, exponent=5.6, years_ahead=5, fit=None):
+    """Génère des points pour la courbe de loi de puissance.
+
+    Avec un `fit` prêt, l'exposant et A viennent de la régression sur l'historique
+    et la bande de confiance est renvoyée ; sinon A est calibré sur le prix spot `price_eur`.
+    """
     current_days = days_since_genesis(current_date)
-    price_eur = get_btc_price_eur()
-    A = price_eur / (current_days ** exponent)
+    if fit is not None and fit.is_ready():
+        exponent = fit.exponent
+        A = fit.A
+    else:
+        fit = None
+        A = price_eur / (current_days ** exponent)
     
-    points = []
+    points = TimeSeries()
+    band_low = TimeSeries()
+    band_high = TimeSeries()
     for i in range(0, (years_ahead * 365) + 1, 30):  # Tous les 30 jours pour lisser
         day = current_days + i
-        year = 2009 + (day / 365.25)
+        ts = GENESIS_TS + day * 86400
         price = A * (day ** exponent)
-        points.append({'x': year, 'y': price})
-    return points, A, exponent
+        points.append(ts, price)
+        if fit is not None:
+            low, high = fit.band(day)
+            band_low.append(ts, low)
+            band_high.append(ts, high)
+    return points, A, exponent, (band_low, band_high)
 
 def calculate_mined_btc(start_block, current_block):
     """Calcule le total de BTC minés depuis le bloc de départ jusqu'au bloc actuel."""
@@ -98,37 +401,112 @@ def calculate_mined_btc(start_block, current_block):
     
     return total_btc
 
-def calculate_opportunity_cost(share=0.03):  # 3% de part hypothétique
-    """Calcule le coût d'opportunité, plus données pour graphique."""
+class LiveDataSource:
+    """Fournisseur de données réseau par défaut (Blockstream, CoinGecko, Blockchain.info).
+
+    Toute classe exposant ces quatre méthodes peut le remplacer (cache, base interne,
+    doublure de test). historical_prices renvoie tout l'historique disponible : la
+    loi de puissance est ajustée dessus, le graphique n'en montre que la fenêtre
+    depuis 2018. Avec strict=True, les erreurs réseau sont levées au lieu des fallbacks.
+    """
+
+    def __init__(self, strict=False):
+        self.strict = strict
+
+    def block_height(self):
+        return get_current_block_height(strict=self.strict)
+
+    def price_eur(self):
+        return get_btc_price_eur(strict=self.strict)
+
+    def hash_rate_series(self):
+        return get_hash_rate_series(strict=self.strict)
+
+    def historical_prices(self, current_date):
+        """Prix journaliers depuis la genèse (en pratique, depuis le début des données CoinGecko)."""
+        return get_historical_prices(current_date, strict=self.strict, from_ts=GENESIS_TS)
+
+class DataSnapshot:
+    """Données d'entrée des calculs : une fois construites, aucun accès réseau n'est nécessaire."""
+
+    def __init__(self, current_block, price_eur, hash_rate_ths, hist_series, current_date=None):
+        self.current_block = current_block
+        self.price_eur = price_eur
+        self.hash_rate_ths = hash_rate_ths
+        self.hist_series = hist_series
+        self.current_date = current_date or date.today()
+
+    def to_dict(self):
+        return {
+            'current_block': self.current_block,
+            'price_eur': self.price_eur,
+            'hash_rate_ths': self.hash_rate_ths,
+            'hist_t': list(self.hist_series.t),
+            'hist_v': list(self.hist_series.v),
+            'current_date': self.current_date.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['current_block'], data['price_eur'], data['hash_rate_ths'],
+                   TimeSeries(data['hist_t'], data['hist_v']), date.fromisoformat(data['current_date']))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+def fetch_snapshot(source=None, current_date=None):
+    """Interroge un fournisseur (LiveDataSource par défaut) et fige ses données."""
+    if source is None:
+        source = LiveDataSource()
+    current_date = current_date or date.today()
+    return DataSnapshot(source.block_height(), source.price_eur(), source.hash_rate_series().last(),
+                        source.historical_prices(current_date), current_date)
+
+def calculate_opportunity_cost(share=0.03, source=None):  # 3% de part hypothétique
+    """Calcule le coût d'opportunité, plus données pour graphique (données récupérées via `source`)."""
+    return compute_opportunity_cost(fetch_snapshot(source), share)
+
+def compute_opportunity_cost(snapshot, share=0.03):
+    """Calcule le coût d'opportunité depuis un DataSnapshot, sans accès réseau."""
     start_block = 499500  # Hauteur approximative au 1er janvier 2018
-    current_block = get_current_block_height()
-    price_eur = get_btc_price_eur()
-    current_date = date.today()
+    current_block = snapshot.current_block
+    price_eur = snapshot.price_eur
+    current_date = snapshot.current_date
     
     total_mined_btc = calculate_mined_btc(start_block, current_block)
     france_btc_past = total_mined_btc * share
     value_eur_past = france_btc_past * price_eur
     total_euros_past = int(value_eur_past)  # En euros complets
     
-    # Données historiques pour le graphique
-    hist_points = get_historical_prices(current_date)
+    # Régression de la loi de puissance sur tout l'historique (hebdomadaire, pour ne pas
+    # surpondérer les années récentes) ; graphique sur la fenêtre depuis 2018
+    fit_series = snapshot.hist_series.resample('week')
+    hist_series = snapshot.hist_series.slice(HISTORY_START_TS)
+    fit = PowerLawFit()
+    for ts, p in fit_series:
+        fit.add_timestamp(ts * 1000, p)
+    hist_points = hist_series.resample('week')  # Hebdomadaire pour le graphique
     
     initial_blocks = current_block - start_block
     
     # Calcul initial MW/jour total réseau (puissance moyenne)
-    hr_ths = get_current_hash_rate_ths()
-    eff = 30  # J/TH moyenne
-    total_power_w = hr_ths * eff
-    total_mw = total_power_w / 1_000_000
+    total_mw = hash_rate_to_mw(snapshot.hash_rate_ths)  # 30 J/TH moyenne
     
     # Points pour loi de puissance
-    power_points, A, exponent = get_power_law_points(current_date)
+    power_points, A, exponent, power_band = get_power_law_points(current_date, price_eur, fit=fit)
     
     return {
         'france_btc_past': france_btc_past,
         'total_euros_past': total_euros_past,
         'price_eur': price_eur,
         'share': share,
+        'hist_series': hist_series,
         'hist_points': hist_points,
         'initial_blocks': initial_blocks,
         'start_block': start_block,
@@ -137,12 +515,584 @@ def calculate_opportunity_cost(share=0.03):  # 3% de part hypothétique
         'initial_total_mw': total_mw,
         'power_points': power_points,
         'A': A,
-        'exponent': exponent
+        'exponent': exponent,
+        'power_band_low': power_band[0],
+        'power_band_high': power_band[1],
+        'fit_points': fit.n,
+        'fit_start_year': datetime.fromtimestamp(fit_series.t[0], timezone.utc).year if len(fit_series) else 2018,
+        'fit_residual_std': fit.residual_std() if fit.is_ready() else 0.0
+    }
+
+# --- Simulation de déploiement (miroir de updateSimulation en JS) ---
+
+CURRENT_HASH_EH_S = 1000  # Hash global actuel (EH/s)
+BASE_FRENCH_HASH_EH_S = 55.6  # Pour 1 GW à 18 J/TH
+BLOCKS_PER_DAY = 144
+DAYS_PER_YEAR = 365.25
+FEES_PER_BLOCK = 0.022
+SIM_YEARS = (2026, 2027, 2028, 2029, 2030, 2031, 2032)
+SIM_PARAMS = ('gw', 'exponent', 'growth', 'exchange')
+
+def get_average_reward(year):
+    """Récompense moyenne par bloc (subvention + frais), halving approx avril 2028."""
+    if year < 2028:
+        return 3.125 + FEES_PER_BLOCK
+    if year < 2032:
+        if year == 2028:
+            # Moyenne 2028 : ~121 jours à 3.125, reste à 1.5625
+            full_reward_days = 121 / DAYS_PER_YEAR
+            return (3.125 * full_reward_days + 1.5625 * (1 - full_reward_days)) + FEES_PER_BLOCK
+        return 1.5625 + FEES_PER_BLOCK
+    return 0.78125 + FEES_PER_BLOCK  # Post-2032
+
+def simulate_projection(fit_A, fit_exponent, gw=1.0, exponent=None, growth=30, exchange=0.85, years=SIM_YEARS):
+    """Projection annuelle des revenus avec dérivées partielles et élasticités.
+
+    Forme fermée : revenu = K_an * gw * g^-(an-2026) * P0 * (t/t0)^exposant * change,
+    d'où les dérivées analytiques calculées dans la même passe que les revenus
+    (coût d'une évaluation au lieu de 2 x P re-simulations).
+    Chaque ligne contient 'd_revenue'/'d_cumulative' (dérivées par paramètre) et
+    'e_revenue'/'e_cumulative' (élasticités : % de variation pour +1% du paramètre).
+    """
+    if exponent is None:
+        exponent = fit_exponent
+    values = {'gw': gw, 'exponent': exponent, 'growth': growth, 'exchange': exchange}
+    growth_rate = 1 + growth / 100
+    anchor_days = days_since_genesis(date(2025, 7, 1))
+    anchor_price = fit_A * anchor_days ** fit_exponent  # Pivot sur la courbe ajustée
+    rows = []
+    cumulative = 0.0
+    d_cumulative = dict.fromkeys(SIM_PARAMS, 0.0)
+    for year in years:
+        days = days_since_genesis(date(year, 7, 1))
+        k = year - 2026
+        price_usd = anchor_price * (days / anchor_days) ** exponent
+        hash_pct = (BASE_FRENCH_HASH_EH_S * gw) / (CURRENT_HASH_EH_S * growth_rate ** k) * 100
+        btc_mined = (hash_pct / 100) * get_average_reward(year) * BLOCKS_PER_DAY * DAYS_PER_YEAR
+        revenue = btc_mined * price_usd * exchange
+        cumulative += revenue
+        # Dérivées logarithmiques de la forme fermée
+        dlog = {
+            'gw': 1 / gw,
+            'exponent': math.log(days / anchor_days),
+            'growth': -k / (100 + growth),
+            'exchange': 1 / exchange,
+        }
+        d_revenue = {name: revenue * dlog[name] for name in SIM_PARAMS}
+        for name in SIM_PARAMS:
+            d_cumulative[name] += d_revenue[name]
+        rows.append({
+            'year': year,
+            'price_usd': price_usd,
+            'hash_pct': hash_pct,
+            'btc_mined': btc_mined,
+            'revenue_eur': revenue,
+            'cumulative_eur': cumulative,
+            'd_revenue': d_revenue,
+            'd_cumulative': dict(d_cumulative),
+            'e_revenue': {n: d_revenue[n] * values[n] / revenue if revenue else 0.0 for n in SIM_PARAMS},
+            'e_cumulative': {n: d_cumulative[n] * values[n] / cumulative if cumulative else 0.0 for n in SIM_PARAMS},
+        })
+    return rows
+
+# --- Dispatch horaire sur surplus du réseau français ---
+
+HALVING_4_HEIGHT = 840000
+HALVING_4_TS = 1713571767  # 20/04/2024, bloc 840000
+BLOCK_INTERVAL_S = 600
+# Repères (hauteur, timestamp) pour dater les blocs : halvings réels et bloc de départ
+# du compteur (499500 ~ 01/01/2018) ; interpolation entre eux, 10 min par bloc au-delà
+BLOCK_TIME_ANCHORS = ((210000, 1354116278), (420000, 1468082773), (499500, 1514764800),
+                      (630000, 1589225023), (HALVING_4_HEIGHT, HALVING_4_TS))
+
+def block_timestamp(height):
+    """Timestamp approximatif du bloc `height` (interpolation entre repères connus)."""
+    anchors = BLOCK_TIME_ANCHORS
+    for (h0, t0), (h1, t1) in zip(anchors, anchors[1:]):
+        if height < h1:
+            return t0 + (height - h0) * (t1 - t0) / (h1 - h0)
+    h_last, t_last = anchors[-1]
+    return t_last + (height - h_last) * BLOCK_INTERVAL_S
+
+def block_height_at(ts):
+    """Inverse de block_timestamp : hauteur (fractionnaire) à l'instant ts."""
+    anchors = BLOCK_TIME_ANCHORS
+    for (h0, t0), (h1, t1) in zip(anchors, anchors[1:]):
+        if ts < t1:
+            return h0 + (ts - t0) * (h1 - h0) / (t1 - t0)
+    h_last, t_last = anchors[-1]
+    return h_last + (ts - t_last) / BLOCK_INTERVAL_S
+
+def block_reward_at(ts):
+    """Récompense moyenne par bloc (subvention + frais) à l'instant ts.
+
+    La hauteur vient de block_height_at : les halvings tombent à leur date réelle.
+
+    >>> block_reward_at(datetime(2020, 5, 1, tzinfo=timezone.utc).timestamp())  # Avant le halving du 11/05/2020
+    12.522
+    >>> block_reward_at(datetime(2020, 5, 12, tzinfo=timezone.utc).timestamp())
+    6.272
+    """
+    height = block_height_at(ts)
+    return 50 / 2 ** (int(height) // 210000) + FEES_PER_BLOCK
+
+def _parse_timestamp(value):
+    """Timestamp unix (s) depuis un nombre, un datetime ou une date ISO 8601 (UTC si sans fuseau)."""
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            return float(value)
+        except ValueError:
+            dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def iter_hourly_grid(path, chunk_size=8760, ts_col='timestamp', surplus_col='surplus_mw',
+                     price_col='price_eur_mwh'):
+    """Lit un fichier horaire (CSV ou Parquet) par blocs de (timestamps, surplus MW, prix €/MWh).
+
+    Le fichier n'est jamais chargé entier : mémoire bornée par `chunk_size` lignes.
+    Le Parquet nécessite pyarrow (importé seulement dans ce cas).
+    """
+    if str(path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size,
+                                                       columns=[ts_col, surplus_col, price_col]):
+            cols = batch.to_pydict()
+            ts = [_parse_timestamp(v) for v in cols[ts_col]]
+            # Valeurs nulles -> 0, comme les cellules vides du CSV
+            yield ts, [float(v or 0) for v in cols[surplus_col]], [float(v or 0) for v in cols[price_col]]
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        ts, surplus, price = [], [], []
+        for row in reader:
+            ts.append(_parse_timestamp(row[ts_col]))
+            surplus.append(float(row[surplus_col] or 0))
+            price.append(float(row[price_col] or 0))
+            if len(ts) >= chunk_size:
+                yield ts, surplus, price
+                ts, surplus, price = [], [], []
+        if ts:
+            yield ts, surplus, price
+
+def _dispatch_sums(hours, capacities_mw, surplus_only):
+    """Sommes (heures, MWh, BTC, revenus, coût) par capacité sur un groupe d'heures de minage.
+
+    `hours` : tuples (surplus MW, BTC/MWh, €/MWh de revenu, prix spot €/MWh). La
+    puissance vaut min(capacité, surplus) : heures triées par surplus et sommes
+    cumulées, chaque capacité coûte une recherche dichotomique au lieu d'un
+    parcours des heures.
+    """
+    n = len(hours)
+    if surplus_only:
+        hours.sort()
+    surplus = [h[0] for h in hours]
+    weights = ([1.0] * n, [h[1] for h in hours], [h[2] for h in hours], [h[3] for h in hours])
+    # Sommes cumulées des poids et du surplus pondéré : k premières heures triées
+    cum_w = [list(accumulate(w, initial=0.0)) for w in weights]
+    cum_sw = [list(accumulate(map(mul, surplus, w), initial=0.0)) for w in weights]
+    sums = []
+    for capacity in capacities_mw:
+        if capacity <= 0 or not n:
+            sums.append((0, 0.0, 0.0, 0.0, 0.0))
+            continue
+        # Heures sous la capacité : puissance = surplus ; au-dessus : capacité
+        k = bisect_left(surplus, capacity) if surplus_only else 0
+        values = [cs[k] + capacity * (cw[n] - cw[k]) for cs, cw in zip(cum_sw, cum_w)]
+        sums.append((n, *values))
+    return sums
+
+def simulate_dispatch(chunks, capacities_mw, btc_price_eur, network_hash_eh_s=CURRENT_HASH_EH_S,
+                      efficiency_j_th=18, surplus_only=True):
+    """Simule heure par heure le minage sur surplus pour plusieurs capacités installées.
+
+    `chunks` vient de iter_hourly_grid. `btc_price_eur` et `network_hash_eh_s` sont
+    des constantes ou des TimeSeries (valeur à la date de chaque heure ; hash en TH/s
+    pour une TimeSeries, comme get_hash_rate_series). Les mineurs tournent quand le prix
+    spot est sous le seuil de rentabilité (revenu BTC par MWh) et, si `surplus_only`,
+    seulement sur le surplus disponible. Les colonnes horaires (BTC/MWh, heures de
+    minage, année) sont calculées une fois par bloc de lignes ; chaque capacité est
+    ensuite agrégée sur le bloc entier (_dispatch_sums).
+
+    Renvoie une liste de dicts par capacité : heures, énergie, BTC, revenus, coût et
+    marge nette, au total et par année.
+    """
+    eh_s_per_mw = 1e6 / efficiency_j_th / 1e6  # TH/s par MW -> EH/s par MW
+    fields = ('hours_run', 'energy_mwh', 'btc_mined', 'revenue_eur', 'energy_cost_eur')
+    totals = [dict.fromkeys(fields, 0.0) for _ in capacities_mw]
+    by_year = [{} for _ in capacities_mw]
+    hash_is_series = isinstance(network_hash_eh_s, TimeSeries)
+    price_is_series = isinstance(btc_price_eur, TimeSeries)
+    year = year_start = year_end = None
+    for ts_chunk, surplus_chunk, price_chunk in chunks:
+        groups = {}  # Année -> heures de minage du bloc
+        for ts, surplus, spot in zip(ts_chunk, surplus_chunk, price_chunk):
+            network = network_hash_eh_s.asof(ts, network_hash_eh_s.first()) / 1e6 if hash_is_series else network_hash_eh_s
+            btc_price = btc_price_eur.asof(ts, btc_price_eur.first()) if price_is_series else btc_price_eur
+            # BTC minés par MWh consommé : part du hash x blocs de l'heure
+            btc_per_mwh = eh_s_per_mw / network * block_reward_at(ts) * (3600 / BLOCK_INTERVAL_S)
+            if spot >= btc_per_mwh * btc_price or (surplus_only and surplus <= 0):
+                continue
+            if year is None or not (year_start <= ts < year_end):
+                year = datetime.fromtimestamp(ts, timezone.utc).year
+                year_start = datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+                year_end = datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp()
+            groups.setdefault(year, []).append((surplus, btc_per_mwh, btc_per_mwh * btc_price, spot))
+        for group_year, hours in groups.items():
+            for i, values in enumerate(_dispatch_sums(hours, capacities_mw, surplus_only)):
+                if not values[0]:
+                    continue
+                year_acc = by_year[i].get(group_year)
+                if year_acc is None:
+                    year_acc = by_year[i][group_year] = dict.fromkeys(fields, 0.0)
+                for acc in (totals[i], year_acc):
+                    for field, value in zip(fields, values):
+                        acc[field] += value
+    results = []
+    for i, capacity in enumerate(capacities_mw):
+        for acc in [totals[i]] + list(by_year[i].values()):
+            acc['net_margin_eur'] = acc['revenue_eur'] - acc['energy_cost_eur']
+        results.append(dict(totals[i], capacity_mw=capacity, by_year=dict(sorted(by_year[i].items()))))
+    return results
+
+# --- Stratégies de trésorerie sur les BTC contrefactuels ---
+
+TREASURY_KINDS = ('hold', 'sell_on_mine', 'split', 'sell_monthly', 'dca')
+TREASURY_PARALLEL_MIN_STEPS = 2_000_000  # Jours x stratégies (~0.3 s) : en dessous, les processus coûtent plus qu'ils ne rapportent
+
+def build_treasury_ledger(snapshot, share=0.03, start_block=499500):
+    """Journal quotidien des BTC « manqués » joints au prix du jour de leur minage.
+
+    L'émission bloc par bloc (subvention, comme calculate_mined_btc) est agrégée par
+    jour UTC puis jointe au prix de clôture du jour (asof sur snapshot.hist_series) :
+    quelques milliers de lignes au lieu de centaines de milliers de blocs, calculées
+    une seule fois pour toutes les stratégies.
+    """
+    prices = snapshot.hist_series
+    end_ts = block_timestamp(snapshot.current_block)
+    day = int(block_timestamp(start_block) // 86400) * 86400
+    ledger = {'t': array('d'), 'btc': array('d'), 'price': array('d'), 'month_end': array('b'),
+              'spot': snapshot.price_eur, 'share': share}
+    height = start_block
+    while day < end_ts:
+        next_height = min(block_height_at(day + 86400), snapshot.current_block)
+        ledger['t'].append(day)
+        ledger['btc'].append(calculate_mined_btc(height, next_height) * share)
+        ledger['price'].append(prices.asof(day + 86399, prices.first()))
+        ledger['month_end'].append(datetime.fromtimestamp(day + 86400, timezone.utc).day == 1)
+        height = next_height
+        day += 86400
+    if ledger['month_end']:  # Vide si start_block >= current_block
+        ledger['month_end'][-1] = 1  # Dernier jour : clôture de la période en cours
+    ledger['proceeds'] = array('d', map(float.__mul__, ledger['btc'], ledger['price']))
+    return ledger
+
+def treasury_strategy_grid():
+    """Variantes par défaut : conserver, vendre au minage, vente partielle au minage,
+    vente mensuelle d'un pourcentage du stock et réinvestissement DCA sur N mois."""
+    strategies = [{'kind': 'hold'}, {'kind': 'sell_on_mine'}]
+    strategies += [{'kind': 'split', 'pct': pct} for pct in range(5, 100, 5)]
+    strategies += [{'kind': 'sell_monthly', 'pct': pct} for pct in range(1, 101)]
+    strategies += [{'kind': 'dca', 'months': months} for months in range(1, 121)]
+    return strategies
+
+def _strategy_label(strategy):
+    kind = strategy['kind']
+    if kind == 'hold':
+        return "Conserver"
+    if kind == 'sell_on_mine':
+        return "Vendre au minage"
+    if kind == 'split':
+        return f"Vendre {strategy['pct']} % au minage"
+    if kind == 'sell_monthly':
+        return f"Vendre {strategy['pct']} % du stock chaque mois"
+    return f"Vendre au minage, racheter sur {strategy['months']} mois (DCA)"
+
+def run_treasury_strategy(ledger, strategy):
+    """Applique une stratégie au journal et renvoie BTC détenus, trésorerie et valeur au prix spot.
+
+    `strategy` est un dict {'kind': ...} (voir TREASURY_KINDS) avec 'pct' (split,
+    sell_monthly) ou 'months' (dca). Conserver et vendre au minage sont des sommes
+    directes sur les colonnes du journal ; les autres parcourent les jours une fois.
+    """
+    kind = strategy['kind']
+    if kind not in TREASURY_KINDS:
+        raise ValueError(f"Stratégie inconnue : {kind}")
+    btc = cash = sold_btc = sales_eur = 0.0
+    if kind == 'hold':
+        btc = math.fsum(ledger['btc'])
+    elif kind == 'sell_on_mine':
+        sold_btc = math.fsum(ledger['btc'])
+        cash = sales_eur = math.fsum(ledger['proceeds'])
+    elif kind == 'split':
+        frac = strategy['pct'] / 100
+        sold_btc = math.fsum(ledger['btc']) * frac
+        cash = sales_eur = math.fsum(ledger['proceeds']) * frac
+        btc = math.fsum(ledger['btc']) - sold_btc
+    elif kind == 'sell_monthly':
+        frac = strategy['pct'] / 100
+        for mined, price, month_end in zip(ledger['btc'], ledger['price'], ledger['month_end']):
+            btc += mined
+            if month_end:
+                sold = btc * frac
+                btc -= sold
+                sold_btc += sold
+                sales_eur += sold * price
+        cash = sales_eur
+    else:
+        # Produit des ventes d'un mois réparti en `months` achats aux clôtures mensuelles suivantes
+        months = strategy['months']
+        tranches = [0.0] * months
+        month_proceeds = 0.0
+        for mined, price, proceeds, month_end in zip(ledger['btc'], ledger['price'],
+                                                     ledger['proceeds'], ledger['month_end']):
+            sold_btc += mined
+            sales_eur += proceeds
+            month_proceeds += proceeds
+            if month_end:
+                for i in range(months):
+                    tranches[i] += month_proceeds / months
+                month_proceeds = 0.0
+                btc += tranches.pop(0) / price
+                tranches.append(0.0)
+        cash = math.fsum(tranches)  # Tranches pas encore réinvesties
+    spot = ledger['spot']
+    value = cash + btc * spot
+    return {
+        'strategy': strategy,
+        'label': _strategy_label(strategy),
+        'btc_held': btc,
+        'cash_eur': cash,
+        'value_eur': value,
+        'btc_sold': sold_btc,
+        'avg_sale_price_eur': sales_eur / sold_btc if sold_btc else 0.0,
+        'vs_spot_eur': value - math.fsum(ledger['btc']) * spot,  # Écart à la valorisation au prix actuel
+    }
+
+_WORKER_LEDGER = None
+
+def _init_treasury_worker(ledger):
+    global _WORKER_LEDGER
+    _WORKER_LEDGER = ledger
+
+def _run_worker_strategy(strategy):
+    return run_treasury_strategy(_WORKER_LEDGER, strategy)
+
+def evaluate_strategies(ledger, strategies=None, workers=None):
+    """Évalue des variantes de stratégie, réparties sur plusieurs processus si le calcul est long.
+
+    Par défaut (workers=None), tous les cœurs ne sont utilisés qu'au-delà de
+    TREASURY_PARALLEL_MIN_STEPS jours x stratégies : la grille par défaut (~0.1 s)
+    reste dans le processus courant. workers=1 force le calcul séquentiel, workers > 1
+    le parallélisme. Le journal n'est transmis qu'une fois par processus (initializer) ;
+    les stratégies sont envoyées par lots. Résultats triés par valeur décroissante.
+    """
+    if strategies is None:
+        strategies = treasury_strategy_grid()
+    if workers is None:
+        large = len(strategies) * len(ledger['t']) >= TREASURY_PARALLEL_MIN_STEPS
+        workers = (os.cpu_count() or 1) if large else 1
+    if workers == 1 or len(strategies) < 2:
+        results = [run_treasury_strategy(ledger, s) for s in strategies]
+    else:
+        chunksize = max(1, len(strategies) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_treasury_worker,
+                                 initargs=(ledger,)) as executor:
+            results = list(executor.map(_run_worker_strategy, strategies, chunksize=chunksize))
+    results.sort(key=lambda r: r['value_eur'], reverse=True)
+    return results
+
+# --- Graphiques SVG pré-rendus (premier affichage sans JavaScript) ---
+
+SVG_MARGIN = {'left': 70, 'right': 20, 'top': 50, 'bottom': 40}
+
+def _compact(value):
+    """Format court pour les axes : 950, 12.5 k, 3.4 M, 1.2 Md."""
+    for threshold, suffix in ((1e9, ' Md'), (1e6, ' M'), (1e3, ' k')):
+        if abs(value) >= threshold:
+            return f"{value / threshold:.3g}{suffix}"
+    return f"{value:.3g}"
+
+def _nice_ticks(lo, hi, count=5):
+    """Graduations « rondes » (1, 2, 5 x 10^n) couvrant [lo, hi]."""
+    if hi <= lo:
+        hi = lo + 1
+    raw = (hi - lo) / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    start = math.floor(lo / step) * step
+    ticks = []
+    tick = start
+    while tick <= hi + step * 1e-9:
+        ticks.append(tick)
+        tick += step
+    if ticks[-1] < hi:
+        ticks.append(tick)
+    return ticks
+
+def render_svg_chart(datasets, labels=None, kind='line', title='', y_from_zero=True,
+                     width=800, height=400, svg_id=None):
+    """Rend un graphique statique en SVG, dans le style des graphiques Chart.js de la page.
+
+    `datasets` : liste de dicts {'y', 'color', 'label'} plus 'x' pour un axe numérique,
+    'dash' (pointillés) et 'fill' (aire sous la courbe). Avec `labels`, l'axe est
+    catégoriel. `kind` : 'line', 'bar', ou 'hbar' (barres horizontales, labels en y).
+    """
+    left = SVG_MARGIN['left'] if kind != 'hbar' else 180  # Place pour les labels en y
+    top = SVG_MARGIN['top']
+    plot_w = width - left - SVG_MARGIN['right']
+    plot_h = height - top - SVG_MARGIN['bottom']
+    values = [v for d in datasets for v in d['y']]
+    lo, hi = min(values), max(values)
+    if y_from_zero or kind in ('bar', 'hbar'):
+        lo, hi = min(lo, 0), max(hi, 0)
+    ticks = _nice_ticks(lo, hi)
+    lo, hi = ticks[0], ticks[-1]
+    out = [f'<svg{f" id={chr(34)}{svg_id}{chr(34)}" if svg_id else ""} xmlns="http://www.w3.org/2000/svg" '
+           f'viewBox="0 0 {width} {height}" style="width: 100%; height: auto;" role="img" '
+           f'aria-label="{html.escape(title)}" font-family="Arial, sans-serif" font-size="12" fill="#ccc">']
+    if title:
+        out.append(f'<text x="{width / 2}" y="18" text-anchor="middle" font-size="14" fill="#fff">{html.escape(title)}</text>')
+    legend_x = left
+    for d in datasets:
+        if d.get('label'):
+            out.append(f'<rect x="{legend_x}" y="28" width="12" height="12" fill="{d["color"]}"/>'
+                       f'<text x="{legend_x + 16}" y="38">{html.escape(d["label"])}</text>')
+            legend_x += 24 + 7 * len(d['label'])
+
+    if kind == 'hbar':
+        # Valeurs sur l'axe horizontal, une barre par label
+        def sx(v):
+            return left + (v - lo) / (hi - lo) * plot_w
+        for tick in ticks:
+            out.append(f'<line x1="{sx(tick):.1f}" y1="{top}" x2="{sx(tick):.1f}" y2="{top + plot_h}" stroke="rgba(255,255,255,0.1)"/>'
+                       f'<text x="{sx(tick):.1f}" y="{top + plot_h + 16}" text-anchor="middle">{tick:.3g}</text>')
+        band = plot_h / len(labels)
+        for d in datasets:
+            for i, v in enumerate(d['y']):
+                x0, x1 = sorted((sx(0), sx(v)))
+                out.append(f'<rect x="{x0:.1f}" y="{top + i * band + band * 0.15:.1f}" width="{x1 - x0:.1f}" '
+                           f'height="{band * 0.7:.1f}" fill="{d["colors"][i] if "colors" in d else d["color"]}"/>')
+        for i, label in enumerate(labels):
+            out.append(f'<text x="{left - 6}" y="{top + (i + 0.5) * band + 4:.1f}" text-anchor="end">{html.escape(str(label))}</text>')
+        out.append('</svg>')
+        return ''.join(out)
+
+    def sy(v):
+        return top + plot_h - (v - lo) / (hi - lo) * plot_h
+    for tick in ticks:
+        out.append(f'<line x1="{left}" y1="{sy(tick):.1f}" x2="{left + plot_w}" y2="{sy(tick):.1f}" stroke="rgba(255,255,255,0.1)"/>'
+                   f'<text x="{left - 6}" y="{sy(tick) + 4:.1f}" text-anchor="end">{_compact(tick)}</text>')
+    if labels is not None:
+        slot = plot_w / len(labels)
+        xs = [left + (i + 0.5) * slot for i in range(len(labels))]
+        for x, label in zip(xs, labels):
+            out.append(f'<text x="{x:.1f}" y="{top + plot_h + 16}" text-anchor="middle">{html.escape(str(label))}</text>')
+        positions = [xs] * len(datasets)
+    else:
+        all_x = [x for d in datasets for x in d['x']]
+        x_lo, x_hi = min(all_x), max(all_x)
+        x_ticks = [t for t in _nice_ticks(x_lo, x_hi) if x_lo <= t <= x_hi]
+
+        def sx(v):
+            return left + (v - x_lo) / ((x_hi - x_lo) or 1) * plot_w
+        for tick in x_ticks:
+            out.append(f'<text x="{sx(tick):.1f}" y="{top + plot_h + 16}" text-anchor="middle">{tick:g}</text>')
+        positions = [[sx(x) for x in d['x']] for d in datasets]
+
+    for d, xs in zip(datasets, positions):
+        if kind == 'bar':
+            bar_w = plot_w / len(xs) * 0.7
+            colors = d.get('colors', [d['color']])
+            for i, (x, v) in enumerate(zip(xs, d['y'])):
+                y0, y1 = sorted((sy(0), sy(v)))
+                out.append(f'<rect x="{x - bar_w / 2:.1f}" y="{y0:.1f}" width="{bar_w:.1f}" height="{y1 - y0:.1f}" '
+                           f'fill="{colors[i % len(colors)]}"/>')
+            continue
+        coords = ' '.join(f'{x:.1f},{sy(v):.1f}' for x, v in zip(xs, d['y']))
+        if d.get('fill'):
+            out.append(f'<polygon points="{xs[0]:.1f},{sy(lo):.1f} {coords} {xs[-1]:.1f},{sy(lo):.1f}" '
+                       f'fill="{d["fill"]}" stroke="none"/>')
+        dash = ' stroke-dasharray="5,5"' if d.get('dash') else ''
+        out.append(f'<polyline points="{coords}" fill="none" stroke="{d["color"]}" stroke-width="2"{dash}/>')
+    out.append('</svg>')
+    return ''.join(out)
+
+def render_static_charts(result):
+    """SVG des graphiques de la page pour les paramètres par défaut de la simulation."""
+    sensitivity_labels = {'gw': 'Nombre de GW', 'exponent': 'Exposant loi de puissance',
+                          'growth': 'Croissance hash/an', 'exchange': 'Taux USD/EUR'}
+    hist, power = result['hist_points'], result['power_points']
+    charts = {
+        'powerLawChart': render_svg_chart([
+            {'x': hist.fractional_years(), 'y': list(hist.v), 'color': '#F7931A', 'label': 'Prix Historique (EUR)'},
+            {'x': power.fractional_years(), 'y': list(power.v), 'color': '#FF6B35', 'dash': True,
+             'label': f"Loi de Puissance (exposant {result['exponent']:.2f})"},
+        ], svg_id='powerLawChartSvg'),
+    }
+    rows = simulate_projection(result['A'], result['exponent'], exponent=round(result['exponent'], 1))
+    years = [row['year'] for row in rows]
+    charts['priceChart'] = render_svg_chart(
+        [{'y': [r['price_usd'] for r in rows], 'color': '#3b82f6', 'fill': 'rgba(59, 130, 246, 0.1)',
+          'label': 'Prix BTC (USD)'}],
+        labels=years, title='Projection du Prix du Bitcoin (Loi de Puissance)', y_from_zero=False,
+        svg_id='priceChartSvg')
+    charts['revenueChart'] = render_svg_chart(
+        [{'y': [r['revenue_eur'] for r in rows], 'color': '#10b981', 'label': 'Revenus (M EUR)',
+          'colors': ['#10b981', '#f59e0b', '#ef4444', '#8b5cf6', '#06b6d4']}],
+        labels=years, kind='bar', title='Revenus Annuels Projetés', svg_id='revenueChartSvg')
+    charts['cumulativeChart'] = render_svg_chart(
+        [{'y': [r['cumulative_eur'] for r in rows], 'color': '#10b981', 'fill': 'rgba(16, 185, 129, 0.2)',
+          'label': 'Revenus Cumulés (M EUR)'}],
+        labels=years, title='Projection des Revenus Cumulés', svg_id='cumulativeChartSvg')
+    elasticities = sorted(rows[-1]['e_cumulative'].items(), key=lambda item: -abs(item[1]))
+    charts['sensitivityChart'] = render_svg_chart(
+        [{'y': [v for _, v in elasticities], 'color': '#10b981',
+          'colors': ['#10b981' if v >= 0 else '#ef4444' for _, v in elasticities]}],
+        labels=[sensitivity_labels[name] for name, _ in elasticities], kind='hbar',
+        title='Sensibilité des Revenus Cumulés (Tornado)', height=300, svg_id='sensitivityChartSvg')
+    return charts
+
+def _encode_column(values, decimals, order):
+    """Quantifie en virgule fixe, applique `order` différences successives, puis zigzag + varint."""
+    scale = 10 ** decimals
+    ints = [round(v * scale) for v in values]
+    for _ in range(order):
+        ints = ints[:1] + [b - a for a, b in zip(ints, ints[1:])]
+    out = bytearray()
+    for n in ints:
+        n = n * 2 if n >= 0 else -n * 2 - 1  # Zigzag : petits négatifs -> petits positifs
+        while n >= 0x80:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+    return out
+
+def pack_series(series, x_decimals=4, y_decimals=0):
+    """Encode une TimeSeries pour l'embarquer dans la page (décodée par unpackSeries en JS).
+
+    Colonnes x (années fractionnaires) et y quantifiées à la précision d'affichage,
+    x en double différence (pas régulier -> ~0), y en différence simple, le tout
+    en varints concaténés et base64. ~4 caractères par point contre ~45 en JSON.
+    """
+    payload = (_encode_column(series.fractional_years(), x_decimals, 2)
+               + _encode_column(series.v, y_decimals, 1))
+    return {
+        'n': len(series),
+        'xd': x_decimals,
+        'yd': y_decimals,
+        'b64': base64.b64encode(bytes(payload)).decode('ascii')
     }
 
-def generate_html():
-    """Génère le fichier HTML avec mises à jour en temps réel via API."""
-    result = calculate_opportunity_cost()
+def render_html(result, live=False):
+    """Rend la page HTML ; en mode live, les compteurs suivent le flux SSE /events du serveur."""
+    exponent_label = f"{result['exponent']:.2f}"
+    exponent_slider_min = min(4, math.floor(result['exponent']))
+    exponent_slider_max = max(7, math.ceil(result['exponent']))
+    svg = render_static_charts(result)
     
     html_content = f"""
 <!DOCTYPE html>
@@ -151,7 +1101,6 @@ def generate_html():
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Compteur Bitcoin France</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Arial:wght@400;700&display=swap');
         body {{ 
@@ -410,7 +1359,7 @@ def generate_html():
     <div class="container">
         <div class="left">
             <h1>Compteur Bitcoin France</h1>
-            <p>Coût d'<span class="tooltip">opportunité<span class="tooltip-icon">?</span><span class="tooltiptext">Le coût d'opportunité est un terme économique qui désigne ce que vous perdez en choisissant une option plutôt qu'une autre. Ici, c'est le regret financier : "Et si la France avait dépensé de l'argent/énergie pour miner du Bitcoin au lieu d'autre chose (comme des impôts ou des subventions) ? Combien d'euros aurait-elle gagnés aujourd'hui ?"</span></span> si la France avait miné X% (sélectionnable ci-dessous) de la <span class="tooltip">puissance globale de hachage<span class="tooltip-icon">?</span><span class="tooltiptext">La puissance globale de hachage est la vitesse totale à laquelle tous les mineurs du monde font des calculs (hachages) pour résoudre les puzzles mathématiques du Bitcoin. Mesurée en EH/s (exahashs par seconde), c'est la "force de calcul" qui protège le réseau. Actuellement ~1000 EH/s.</span></span> du <span class="tooltip">réseau Bitcoin<span class="tooltip-icon">?</span><span class="tooltiptext">Le réseau Bitcoin est un système décentralisé mondial : un réseau d'ordinateurs (nœuds) qui valident et stockent la blockchain ensemble, sans banque centrale. Il inclut les mineurs (qui sécurisent), les nœuds (qui vérifient) et les utilisateurs (wallets). Miner X% de sa puissance signifie contribuer X% des calculs totaux pour gagner des récompenses.</span></span> depuis 2018. Mises à jour en temps réel toutes les 10 minutes.</p>
+            <p>Coût d'<span class="tooltip">opportunité<span class="tooltip-icon">?</span><span class="tooltiptext">Le coût d'opportunité est un terme économique qui désigne ce que vous perdez en choisissant une option plutôt qu'une autre. Ici, c'est le regret financier : "Et si la France avait dépensé de l'argent/énergie pour miner du Bitcoin au lieu d'autre chose (comme des impôts ou des subventions) ? Combien d'euros aurait-elle gagnés aujourd'hui ?"</span></span> si la France avait miné X% (sélectionnable ci-dessous) de la <span class="tooltip">puissance globale de hachage<span class="tooltip-icon">?</span><span class="tooltiptext">La puissance globale de hachage est la vitesse totale à laquelle tous les mineurs du monde font des calculs (hachages) pour résoudre les puzzles mathématiques du Bitcoin. Mesurée en EH/s (exahashs par seconde), c'est la "force de calcul" qui protège le réseau. Actuellement ~1000 EH/s.</span></span> du <span class="tooltip">réseau Bitcoin<span class="tooltip-icon">?</span><span class="tooltiptext">Le réseau Bitcoin est un système décentralisé mondial : un réseau d'ordinateurs (nœuds) qui valident et stockent la blockchain ensemble, sans banque centrale. Il inclut les mineurs (qui sécurisent), les nœuds (qui vérifient) et les utilisateurs (wallets). Miner X% de sa puissance signifie contribuer X% des calculs totaux pour gagner des récompenses.</span></span> depuis 2018. Mises à jour en temps réel (compteurs extrapolés entre deux blocs).</p>
             
             <select id="shareSelect" class="share-select">
                 <option value="1">1%</option>
@@ -443,9 +1392,10 @@ def generate_html():
         </div>
         
         <div class="right">
-            <h2>Prix Historique BTC (EUR) & Loi de Puissance (exposant 5.6)</h2>
-            <canvas id="powerLawChart"></canvas>
-            <p>La loi de puissance modélise la croissance du prix BTC : P(t) = a * t^5.6, où t = jours depuis genèse (2009). Calibrée sur prix actuel, elle projette une hausse ~35-40%/an. Exposant 5.6 est historique (basé sur données 2010-2025).</p>
+            <h2>Prix Historique BTC (EUR) & Loi de Puissance (exposant {exponent_label})</h2>
+            {svg['powerLawChart']}
+            <canvas id="powerLawChart" style="display: none;"></canvas>
+            <p>La loi de puissance modélise la croissance du prix BTC : P(t) = a * t^{exponent_label}, où t = jours depuis genèse (2009). L'exposant et a sont ajustés par régression log-log sur {result['fit_points']} prix depuis {result['fit_start_year']} (bande de confiance ~95% en pointillés) ; à défaut de données, exposant 5.6 calibré sur le prix actuel.</p>
             <div class="additional-text">
                 <ul>
                     <li>Ce manque à gagner n'inclut pas les potentielles retombées économiques de réindustrialiser la France avec une nouvelle industrie novatrice faisant de l'optimisation sous contraintes de réseaux électriques.</li>
@@ -462,7 +1412,7 @@ def generate_html():
                 <div class="collapsible-content">
                     <ul>
                         <li>Ce script calcule le potentiel manqué en milliards d'euros à miner Bitcoin depuis le 1er Janvier 2018. Il suppose que la France aurait pu dédier une part fixe (1,2,3,5,10 ou 15%) de la puissance de hachage globale du réseau Bitcoin depuis janvier 2018 (une hypothèse réaliste avec différents scénarios et basée sur une estimation d'électricité consommé globalement du Bitcoin ~500 TWh cumulés sur la période). Il fetch les données en temps réel (hauteur de bloc actuelle et prix du BTC en EUR) via des API gratuites. Le total est le nombre de BTC minés multiplié par le prix actuel, converti en milliards d'EUR.</li>
-                        <li>Récupération en temps réel : Toutes les 10 minutes (600 000 ms), le JS fetch les données via les API (hauteur de bloc via Blockstream et prix via CoinGecko). Les API sont gratuites et CORS-compatibles.</li>
+                        <li>Récupération en temps réel : le JS interroge les API (hauteur de bloc via Blockstream, prix via CoinGecko, hash rate via Blockchain.info) à un rythme adaptatif : la hauteur toutes les 5 à 20 minutes selon le temps écoulé depuis le dernier bloc, le prix de 5 à 20 minutes selon sa volatilité, le hash rate toutes les heures. Rien n'est interrogé quand l'onglet est masqué ; entre deux polls, les compteurs progressent au rythme moyen d'un bloc toutes les 10 minutes. Les API sont gratuites et CORS-compatibles.</li>
                         <li>Calculs dynamiques : J'ai intégré une fonction JS calculateMinedBtc qui miroite le calcul Python pour déterminer les BTC minés cumulés (en tenant compte des halvings). Le total gaspillage est recalculé comme (BTC # manqués totaux × prix actuel), et les compteurs s'animent vers les nouvelles valeurs.</li>  
                         <li>Ceci est une simulation, <a href="https://colab.research.google.com/drive/1OC5ePgAxMX47JP14uQVTpBktjd2kZq6u?usp=sharing" target="_blank">j'ouvre le code source pour rendre la logique transparente</a>. Cette simulation peut donner une idée de "l'ordre de grandeur" et un rendement total brut sans pour autant prendre en compte CAPEX et autres considérations techniques et implémentations fines.</li>
                     </ul>
@@ -481,9 +1431,9 @@ def generate_html():
                     </div>
                     
                     <div class="slider-container">
-                        <label>Exposant loi de puissance : <span class="tooltip"><span class="tooltiptext">Exposant dans P(t) = a * t^exposant. 5.6 est calibré historique ; plus haut = croissance plus agressive.</span></span></label>
-                        <input type="range" id="exponentSlider" min="4" max="7" step="0.1" value="5.6">
-                        <span id="exponentValue">5.6</span>
+                        <label>Exposant loi de puissance : <span class="tooltip"><span class="tooltiptext">Exposant dans P(t) = a * t^exposant. {exponent_label} est ajusté sur l'historique ; plus haut = croissance plus agressive.</span></span></label>
+                        <input type="range" id="exponentSlider" min="{exponent_slider_min}" max="{exponent_slider_max}" step="0.1" value="{result['exponent']:.1f}">
+                        <span id="exponentValue">{result['exponent']:.1f}</span>
                     </div>
                     
                     <div class="slider-container">
@@ -501,13 +1451,20 @@ def generate_html():
                     <div id="results-table"></div>
                     
                     <h2>Évolution Projetée du Prix du Bitcoin (USD)</h2>
-                    <canvas id="priceChart" width="800" height="400"></canvas>
+                    {svg['priceChart']}
+                    <canvas id="priceChart" width="800" height="400" style="display: none;"></canvas>
                     
                     <h2>Revenus Annuels Projetés (M EUR)</h2>
-                    <canvas id="revenueChart" width="800" height="400"></canvas>
+                    {svg['revenueChart']}
+                    <canvas id="revenueChart" width="800" height="400" style="display: none;"></canvas>
                     
                     <h2>Revenus Cumulés Projetés (M EUR)</h2>
-                    <canvas id="cumulativeChart" width="800" height="400"></canvas>
+                    {svg['cumulativeChart']}
+                    <canvas id="cumulativeChart" width="800" height="400" style="display: none;"></canvas>
+                    
+                    <h2>Sensibilité des Revenus Cumulés <span class="tooltip"><span class="tooltiptext">Élasticité = variation en % des revenus cumulés pour +1% du paramètre, calculée par dérivées analytiques de la formule (pas de re-simulation). L'exposant domine : +1% sur l'exposant change le prix de toutes les années projetées.</span></span></h2>
+                    {svg['sensitivityChart']}
+                    <canvas id="sensitivityChart" width="800" height="300" style="display: none;"></canvas>
                 </div>            
         </div>
     </div>
@@ -593,100 +1550,257 @@ def generate_html():
             animateCounter('mwhCounter', newMw, 1000, ' MW');
         }}
 
+        // Décodage des séries embarquées (miroir de pack_series en Python)
+        function unpackSeries(packed) {{
+            const bytes = Uint8Array.from(atob(packed.b64), c => c.charCodeAt(0));
+            let pos = 0;
+            function readColumn(n, decimals, order) {{
+                const col = new Float64Array(n);
+                for (let i = 0; i < n; i++) {{
+                    // Varint (arithmétique flottante : les entiers peuvent dépasser 2^31)
+                    let value = 0, mult = 1, b;
+                    do {{
+                        b = bytes[pos++];
+                        value += (b & 0x7F) * mult;
+                        mult *= 128;
+                    }} while (b & 0x80);
+                    col[i] = (value % 2) ? -(value + 1) / 2 : value / 2;
+                }}
+                for (let k = 0; k < order; k++) {{
+                    for (let i = 1; i < n; i++) col[i] += col[i - 1];
+                }}
+                const scale = Math.pow(10, decimals);
+                for (let i = 0; i < n; i++) col[i] /= scale;
+                return col;
+            }}
+            const x = readColumn(packed.n, packed.xd, 2);
+            const y = readColumn(packed.n, packed.yd, 1);
+            return {{ x: x, y: y }};
+        }}
+
+        function seriesPoints(cols) {{
+            const points = new Array(cols.x.length);
+            for (let i = 0; i < cols.x.length; i++) points[i] = {{ x: cols.x[i], y: cols.y[i] }};
+            return points;
+        }}
+
         // Données embeddées initiales
         const initialTotalEuros = {result['total_euros_past']};
         const initialBtc = {result['france_btc_past']};
         const initialPrice = {result['price_eur']};
         const initialBlocks = {result['initial_blocks']};
-        const histData = {json.dumps(result['hist_points'])};
-        const powerData = {json.dumps(result['power_points'])};
+        const histData = seriesPoints(unpackSeries({json.dumps(pack_series(result['hist_points']))}));
+        const powerData = seriesPoints(unpackSeries({json.dumps(pack_series(result['power_points']))}));
+        const powerBandLow = seriesPoints(unpackSeries({json.dumps(pack_series(result['power_band_low']))}));
+        const powerBandHigh = seriesPoints(unpackSeries({json.dumps(pack_series(result['power_band_high']))}));
         const initialTotalMw = {result['initial_total_mw']};
         const startBlock = {result['start_block']};
         const initialCurrentBlock = {result['initial_current_block']};
 
+        const LIVE_STREAM = {'true' if live else 'false'};  // Page servie avec flux SSE /events
         let currentShare = 3;
         let lastHeight = initialCurrentBlock;
         let lastPrice = initialPrice;
         let lastTotalMw = initialTotalMw;
 
-        // Événement pour le dropdown
+        // Événement pour le dropdown : MW déjà connu (rafraîchi par le planificateur), pas de requête
         document.getElementById('shareSelect').onchange = function(e) {{
             currentShare = parseInt(e.target.value);
-            // Mise à jour immédiate avec les dernières données connues
-            if (lastHeight && lastPrice) {{
-                fetch('https://api.blockchain.info/charts/hash-rate?format=json&cors=true')
-                .then(r => r.json())
-                .then(hashData => {{
-                    const hr_ths = hashData.values[hashData.values.length - 1].y;
-                    const eff = 30; // J/TH moyenne
-                    const total_power_w = hr_ths * eff;
-                    const total_mw = total_power_w / 1000000;
-                    updateAllCounters(lastHeight, lastPrice, lastHeight - startBlock, total_mw);
-                    lastTotalMw = total_mw;
-                }})
-                .catch(() => {{
-                    // Fallback avec valeur initiale
-                    updateAllCounters(lastHeight, lastPrice, lastHeight - startBlock, initialTotalMw);
-                }});
-            }}
+            syncCounters();
         }};
 
-        // Fonction de mise à jour en temps réel
-        async function updateData() {{
-            try {{
-                const heightRes = await fetch('https://blockstream.info/api/blocks/tip/height');
-                const heightText = await heightRes.text();
-                const newHeight = parseInt(heightText);
-                
-                const priceRes = await fetch('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=eur');
-                const priceData = await priceRes.json();
-                const newPrice = priceData.bitcoin.eur;
-                
-                // Fetch hash rate pour MW
-                const hrRes = await fetch('https://api.blockchain.info/charts/hash-rate?format=json&cors=true');
-                const hashData = await hrRes.json();
+        // --- Planificateur adaptatif : extrapolation des blocs et polling selon le contexte ---
+        const BLOCK_INTERVAL_S = {BLOCK_INTERVAL_S};  // Intervalle moyen entre blocs
+        // L'extrapolation avance sans plafond : la hauteur réelle ne sert qu'à la recaler
+        const HEIGHT_POLL_MIN_S = 600;
+        const HEIGHT_POLL_MAX_S = 1800;
+        const PRICE_POLL_MIN_S = 600;
+        const PRICE_POLL_MAX_S = 1800;
+        const PRICE_VOLATILITY_REF = 0.01;  // Variation relative entre deux polls jugée « agitée »
+        const HASH_RATE_POLL_S = 3600;  // Le hash rate publié ne change qu'une fois par jour
+        const FIRST_POLL_S = 5;  // Après l'animation initiale des compteurs
+        let lastBlockTime = null;  // Horodatage du dernier bloc (ms), donné par le bloc lui-même
+        let displayedHeight = initialCurrentBlock;
+        let priceVolatility = PRICE_VOLATILITY_REF / 2;
+        let animatingUntil = 0;
+        const pollTimers = {{}};
+        const pollDue = {{}};
+
+        function clamp(value, min, max) {{
+            return Math.min(max, Math.max(min, value));
+        }}
+
+        // Hauteur estimée : blocs attendus depuis le dernier bloc au rythme moyen (sans plafond,
+        // le compteur avance entre deux polls) et jamais en arrière (le bloc réel rejoint l'estimation)
+        function estimatedHeight() {{
+            if (lastBlockTime === null) return Math.max(displayedHeight, lastHeight);
+            const elapsed = Math.max(0, (Date.now() - lastBlockTime) / 1000);
+            displayedHeight = Math.max(displayedHeight, lastHeight + elapsed / BLOCK_INTERVAL_S);
+            return displayedHeight;
+        }}
+
+        function showCounters(height, price, totalMw) {{
+            const share = currentShare / 100;
+            const totalBtc = calculateMinedBtc(height) * share;
+            document.getElementById('totalEurosCounter').textContent = Math.floor(totalBtc * price).toLocaleString() + ' €';
+            document.getElementById('btcCounter').textContent = Math.floor(totalBtc).toLocaleString() + ' BTC';
+            document.getElementById('priceCounter').textContent = price.toFixed(2).toLocaleString() + ' €';
+            document.getElementById('blocksCounter').textContent = Math.floor(height - startBlock).toLocaleString();
+            document.getElementById('mwhCounter').textContent = Math.floor(totalMw * share).toLocaleString() + ' MW';
+        }}
+
+        // Animation vers les nouvelles valeurs après un poll ou un changement de share
+        function syncCounters() {{
+            const height = estimatedHeight();
+            updateAllCounters(height, lastPrice, height - startBlock, lastTotalMw);
+            animatingUntil = Date.now() + 1100;
+            document.getElementById('updateText').textContent = `Dernière mise à jour: ${{new Date().toLocaleString('fr-FR')}}`;
+        }}
+
+        // Rendu continu entre deux polls (inutile onglet masqué ou pendant une animation)
+        function renderEstimate() {{
+            if (document.hidden || Date.now() < animatingUntil) return;
+            showCounters(estimatedHeight(), lastPrice, lastTotalMw);
+        }}
+
+        // blockTimeMs : horodatage du bloc ; à défaut (flux SSE), date de détection
+        function onHeight(newHeight, blockTimeMs) {{
+            if (newHeight > lastHeight || lastBlockTime === null) {{
+                lastHeight = Math.max(lastHeight, newHeight);
+                lastBlockTime = blockTimeMs || Date.now();
+                syncCounters();
+            }}
+        }}
+
+        // Chaque tâche interroge une API et renvoie le délai (s) avant son prochain appel
+        const POLL_TASKS = {{
+            height: async () => {{
+                // Poll léger (un entier) ; l'horodatage n'est demandé que si la hauteur a changé
+                const res = await fetch('https://blockstream.info/api/blocks/tip/height');
+                const newHeight = parseInt(await res.text());
+                if (newHeight > lastHeight || lastBlockTime === null) {{
+                    let blockTimeMs = null;
+                    try {{
+                        // Blocs à partir de newHeight : le premier est la tête
+                        const blocks = await (await fetch(`https://blockstream.info/api/blocks/${{newHeight}}`)).json();
+                        blockTimeMs = blocks[0].timestamp * 1000;
+                    }} catch (e) {{
+                        console.error('Horodatage du bloc indisponible:', e);  // Date de détection à défaut
+                    }}
+                    onHeight(newHeight, blockTimeMs);
+                }}
+                // Juste après un bloc, l'extrapolation suffit ; plus il tarde, plus on resserre
+                const sinceBlock = lastBlockTime === null ? 3 * BLOCK_INTERVAL_S : (Date.now() - lastBlockTime) / 1000;
+                return clamp(3 * BLOCK_INTERVAL_S - sinceBlock, HEIGHT_POLL_MIN_S, HEIGHT_POLL_MAX_S);
+            }},
+            price: async () => {{
+                const res = await fetch('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=eur');
+                const newPrice = (await res.json()).bitcoin.eur;
+                // Volatilité lissée (moyenne exponentielle des variations relatives)
+                priceVolatility = 0.7 * priceVolatility + 0.3 * Math.abs(newPrice - lastPrice) / lastPrice;
+                lastPrice = newPrice;
+                syncCounters();
+                const calm = 1 - Math.min(1, priceVolatility / PRICE_VOLATILITY_REF);
+                return PRICE_POLL_MIN_S + calm * (PRICE_POLL_MAX_S - PRICE_POLL_MIN_S);
+            }},
+            hashRate: async () => {{
+                const res = await fetch('https://api.blockchain.info/charts/hash-rate?format=json&cors=true');
+                const hashData = await res.json();
                 const hr_ths = hashData.values[hashData.values.length - 1].y;
                 const eff = 30; // J/TH moyenne réseau
-                const total_power_w = hr_ths * eff;
-                const total_mw = total_power_w / 1000000;
-                
-                const newBlocks = newHeight - startBlock;
-                
-                // Mise à jour avec share actuel
-                updateAllCounters(newHeight, newPrice, newBlocks, total_mw);
-                
-                // Mise à jour du timestamp
-                document.getElementById('updateText').textContent = `Dernière mise à jour: ${{new Date().toLocaleString('fr-FR')}}`;
-                
-                lastHeight = newHeight;
-                lastPrice = newPrice;
-                lastTotalMw = total_mw;
+                lastTotalMw = hr_ths * eff / 1000000;
+                syncCounters();
+                return HASH_RATE_POLL_S;
+            }}
+        }};
+
+        function schedulePoll(name, delayS) {{
+            clearTimeout(pollTimers[name]);
+            pollDue[name] = Date.now() + delayS * 1000;
+            if (!document.hidden) {{
+                pollTimers[name] = setTimeout(() => runPoll(name), delayS * 1000);
+            }}
+        }}
+
+        async function runPoll(name) {{
+            if (document.hidden) return;  // Reprise au retour sur l'onglet
+            let delayS;
+            try {{
+                delayS = await POLL_TASKS[name]();
             }} catch (e) {{
                 console.error('Erreur lors de la mise à jour:', e);
-                // Fallback
-                updateAllCounters(lastHeight, lastPrice, lastHeight - startBlock, lastTotalMw);
+                delayS = name === 'hashRate' ? HASH_RATE_POLL_S : HEIGHT_POLL_MAX_S;
             }}
+            schedulePoll(name, delayS);
         }}
 
-        // Initialisation
-        window.onload = () => {{
-            // Animation initiale avec share=3
-            const initialShare = 0.03;
-            const initialMw = initialTotalMw * initialShare;
-            
-            document.getElementById('totalEurosCounter').textContent = '0';
-            document.getElementById('btcCounter').textContent = '0';
-            document.getElementById('priceCounter').textContent = '0';
-            document.getElementById('blocksCounter').textContent = '0';
-            document.getElementById('mwhCounter').textContent = '0';
-            
-            animateCounter('totalEurosCounter', initialTotalEuros, 3000, ' €');
-            animateCounter('btcCounter', initialBtc, 3000, ' BTC');
-            animateCounter('priceCounter', initialPrice, 2000, ' €');
-            animateCounter('blocksCounter', initialBlocks, 2000, '');
-            animateCounter('mwhCounter', initialMw, 2000, ' MW');
-            
-            // Graphique Chart.js avec historique et loi de puissance
+        // Onglet masqué : aucun polling ; au retour, rattrapage immédiat des polls échus
+        document.addEventListener('visibilitychange', () => {{
+            Object.keys(POLL_TASKS).forEach(name => {{
+                clearTimeout(pollTimers[name]);
+                if (document.hidden || !(name in pollDue)) return;
+                const remainingS = Math.max(0, (pollDue[name] - Date.now()) / 1000);
+                if (remainingS === 0) runPoll(name);
+                else schedulePoll(name, remainingS);
+            }});
+        }});
+
+        function startScheduler() {{
+            Object.keys(POLL_TASKS).forEach(name => schedulePoll(name, FIRST_POLL_S));
+        }}
+
+        // Flux Server-Sent Events (mode serve) : reconnexion automatique par le navigateur
+        function startLiveStream() {{
+            const source = new EventSource('/events');
+            source.onmessage = (e) => {{
+                const state = JSON.parse(e.data);
+                lastPrice = state.price;
+                lastTotalMw = state.total_mw;
+                if (state.height > lastHeight) onHeight(state.height);
+                else syncCounters();
+            }};
+        }}
+
+        // Chart.js chargé à la demande : les SVG pré-rendus assurent le premier affichage
+        let chartJsPromise = null;
+        function loadChartJs() {{
+            if (!chartJsPromise) {{
+                chartJsPromise = new Promise((resolve, reject) => {{
+                    const script = document.createElement('script');
+                    script.src = 'https://cdn.jsdelivr.net/npm/chart.js';
+                    script.onload = resolve;
+                    script.onerror = reject;
+                    document.head.appendChild(script);
+                }});
+            }}
+            return chartJsPromise;
+        }}
+
+        // Remplace les SVG statiques par les graphiques interactifs quand ils deviennent visibles
+        function whenVisible(ids, draw) {{
+            const placeholders = ids.map(id => document.getElementById(id + 'Svg'));
+            const activate = () => loadChartJs().then(() => {{
+                ids.forEach((id, i) => {{
+                    placeholders[i].style.display = 'none';
+                    document.getElementById(id).style.display = 'block';
+                }});
+                draw();
+            }}).catch(e => console.error('Chart.js indisponible, graphiques statiques conservés:', e));
+            if (!('IntersectionObserver' in window)) {{
+                activate();
+                return;
+            }}
+            const observer = new IntersectionObserver(entries => {{
+                if (entries.some(entry => entry.isIntersecting)) {{
+                    observer.disconnect();
+                    activate();
+                }}
+            }});
+            placeholders.forEach(el => observer.observe(el));
+        }}
+
+        // Graphique Chart.js avec historique et loi de puissance
+        function drawPowerLawChart() {{
             const ctx = document.getElementById('powerLawChart').getContext('2d');
             new Chart(ctx, {{
                 type: 'line',
@@ -702,7 +1816,7 @@ def generate_html():
                             fill: false
                         }},
                         {{
-                            label: 'Loi de Puissance (exposant 5.6)',
+                            label: 'Loi de Puissance (exposant {exponent_label})',
                             data: powerData,
                             borderColor: '#FF6B35',
                             backgroundColor: 'transparent',
@@ -710,6 +1824,26 @@ def generate_html():
                             pointRadius: 0,
                             fill: false,
                             borderDash: [5, 5]
+                        }},
+                        {{
+                            label: 'Bande de confiance (bas)',
+                            data: powerBandLow,
+                            borderColor: 'rgba(255, 107, 53, 0.4)',
+                            backgroundColor: 'transparent',
+                            tension: 0.1,
+                            pointRadius: 0,
+                            fill: false,
+                            borderDash: [2, 4]
+                        }},
+                        {{
+                            label: 'Bande de confiance (haut)',
+                            data: powerBandHigh,
+                            borderColor: 'rgba(255, 107, 53, 0.4)',
+                            backgroundColor: 'rgba(255, 107, 53, 0.08)',
+                            tension: 0.1,
+                            pointRadius: 0,
+                            fill: '-1',
+                            borderDash: [2, 4]
                         }}
                     ]
                 }},
@@ -736,30 +1870,58 @@ def generate_html():
                     }}
                 }}
             }});
+        }}
+
+        // Initialisation
+        window.onload = () => {{
+            // Animation initiale avec share=3
+            const initialShare = 0.03;
+            const initialMw = initialTotalMw * initialShare;
+            
+            document.getElementById('totalEurosCounter').textContent = '0';
+            document.getElementById('btcCounter').textContent = '0';
+            document.getElementById('priceCounter').textContent = '0';
+            document.getElementById('blocksCounter').textContent = '0';
+            document.getElementById('mwhCounter').textContent = '0';
+            
+            animateCounter('totalEurosCounter', initialTotalEuros, 3000, ' €');
+            animateCounter('btcCounter', initialBtc, 3000, ' BTC');
+            animateCounter('priceCounter', initialPrice, 2000, ' €');
+            animateCounter('blocksCounter', initialBlocks, 2000, '');
+            animateCounter('mwhCounter', initialMw, 2000, ' MW');
             
-            // Première mise à jour immédiate pour synchroniser
-            setTimeout(updateData, 10000);
-            setTimeout(updateData, 10000);
-            setTimeout(updateData, 10000);
+            whenVisible(['powerLawChart'], drawPowerLawChart);
             
-            // Mises à jour toutes les minutes
-            setInterval(updateData, 600000);
+            // Compteurs extrapolés chaque seconde entre deux mises à jour
+            animatingUntil = Date.now() + 3100;
+            setInterval(renderEstimate, 1000);
+            
+            if (LIVE_STREAM) {{
+                startLiveStream();
+            }} else {{
+                startScheduler();
+            }}
         }};
 
 
         // Paramètres de simulation
         const GENESIS_DATE = new Date(2009, 0, 3);  // 3 janv 2009
-        const CURRENT_HASH_EH_S = 1000;  // Hash global actuel (EH/s)
-        const BASE_FRENCH_HASH_EH_S = 55.6;   // Pour 1 GW à 18 J/TH
-        const BLOCKS_PER_DAY = 144;
-        const DAYS_PER_YEAR = 365.25;
-        const FEES_PER_BLOCK = 0.022;
-        let A_POWER_LAW = {result['A']};  // Calibré initialement
+        const CURRENT_HASH_EH_S = {CURRENT_HASH_EH_S};  // Hash global actuel (EH/s)
+        const BASE_FRENCH_HASH_EH_S = {BASE_FRENCH_HASH_EH_S};   // Pour 1 GW à 18 J/TH
+        const BLOCKS_PER_DAY = {BLOCKS_PER_DAY};
+        const DAYS_PER_YEAR = {DAYS_PER_YEAR};
+        const FEES_PER_BLOCK = {FEES_PER_BLOCK};
+        const FIT_A = {result['A']};  // Ajusté par régression log-log
+        const FIT_EXPONENT = {result['exponent']};
+        let A_POWER_LAW = FIT_A;  // Calibré initialement
         let ANNUAL_GROWTH_RATE = 1.5;  // 50% initial
         let EXCHANGE_RATE = 0.85;
         let FRENCH_HASH_EH_S = BASE_FRENCH_HASH_EH_S * 1;  // Initial pour 1 GW
         
-        let priceChart, revenueChart, cumulativeChart;
+        let priceChart, revenueChart, cumulativeChart, sensitivityChart;
+        let lastSimulation = null;
+        const SIMULATION_CHARTS = ['priceChart', 'revenueChart', 'cumulativeChart', 'sensitivityChart'];
+        const SENSITIVITY_LABELS = {{ gw: 'Nombre de GW', exponent: 'Exposant loi de puissance', growth: 'Croissance hash/an', exchange: 'Taux USD/EUR' }};
         
         // Halving approx avril 2028 (jour 121 de l'année)
         function getAverageReward(year) {{
@@ -807,19 +1969,22 @@ def generate_html():
         function updateSimulation() {{
             const gw = parseFloat(document.getElementById('gwSlider').value);
             const exponent = parseFloat(document.getElementById('exponentSlider').value);
-            ANNUAL_GROWTH_RATE = 1 + (parseFloat(document.getElementById('growthSlider').value) / 100);
+            const growth = parseFloat(document.getElementById('growthSlider').value);
+            ANNUAL_GROWTH_RATE = 1 + (growth / 100);
             EXCHANGE_RATE = parseFloat(document.getElementById('exchangeSlider').value);
             FRENCH_HASH_EH_S = BASE_FRENCH_HASH_EH_S * gw;
             
-            // Recalculer A si exposant change (calibré sur prix actuel ~123000 USD)
+            // Recalculer A si exposant change (pivot sur la courbe ajustée, pas sur le prix spot volatil)
             const currentDays = getDaysFromGenesis(2025);
-            const currentPrice = {result['price_eur']};
+            const currentPrice = FIT_A * Math.pow(currentDays, FIT_EXPONENT);
             A_POWER_LAW = currentPrice / Math.pow(currentDays, exponent);
             
             // Calcul des données
-            const years = [2026, 2027, 2028, 2029, 2030, 2031, 2032];
+            const years = {json.dumps(list(SIM_YEARS))};
+            const params = {{ gw: gw, exponent: exponent, growth: growth, exchange: EXCHANGE_RATE }};
             let simulationData = [];
             let cumulativeRevenueEur = 0;
+            let dCumulative = {{ gw: 0, exponent: 0, growth: 0, exchange: 0 }};
             
             years.forEach(year => {{
                 const days = getDaysFromGenesis(year);
@@ -833,13 +1998,24 @@ def generate_html():
                 const revenueEur = revenueUsd * EXCHANGE_RATE;
                 cumulativeRevenueEur += revenueEur;
                 
+                // Dérivées partielles analytiques (miroir de simulate_projection en Python)
+                const dRevenue = {{
+                    gw: revenueEur / gw,
+                    exponent: revenueEur * Math.log(days / currentDays),
+                    growth: revenueEur * -(year - 2026) / (100 + growth),
+                    exchange: revenueEur / EXCHANGE_RATE
+                }};
+                Object.keys(dCumulative).forEach(p => {{ dCumulative[p] += dRevenue[p]; }});
+                
                 simulationData.push({{
                     year: year,
                     priceUsd: priceUsd,
                     hashPct: hashPct,
                     btcMined: btcMined,
                     revenueEur: revenueEur,
-                    cumulativeEur: cumulativeRevenueEur
+                    cumulativeEur: cumulativeRevenueEur,
+                    dRevenue: dRevenue,
+                    dCumulative: Object.assign({{}}, dCumulative)
                 }});
             }});
             
@@ -884,10 +2060,21 @@ def generate_html():
             `;
             document.getElementById('results-table').innerHTML = tableHTML;
             
+            lastSimulation = {{ years, simulationData, params, dCumulative, cumulativeRevenueEur }};
+            drawSimulationCharts();
+        }}
+        
+        // Graphiques interactifs de la simulation (une fois Chart.js chargé et la section visible)
+        function drawSimulationCharts() {{
+            if (!lastSimulation || typeof Chart === 'undefined'
+                || document.getElementById('priceChart').style.display === 'none') return;
+            const {{ years, simulationData, params, dCumulative, cumulativeRevenueEur }} = lastSimulation;
+            
             // Mise à jour des graphiques
             if (priceChart) priceChart.destroy();
             if (revenueChart) revenueChart.destroy();
             if (cumulativeChart) cumulativeChart.destroy();
+            if (sensitivityChart) sensitivityChart.destroy();
             
             // Graphique 1: Prix BTC (USD)
             const priceCtx = document.getElementById('priceChart').getContext('2d');
@@ -960,20 +2147,528 @@ def generate_html():
                     plugins: {{ title: {{ display: true, text: 'Projection des Revenus Cumulés' }} }}
                 }}
             }});
+            
+            // Graphique 4: Tornado des élasticités des revenus cumulés (% pour +1% du paramètre)
+            const elasticities = Object.keys(params)
+                .map(p => ({{ label: SENSITIVITY_LABELS[p], value: dCumulative[p] * params[p] / cumulativeRevenueEur }}))
+                .sort((a, b) => Math.abs(b.value) - Math.abs(a.value));
+            const sensitivityCtx = document.getElementById('sensitivityChart').getContext('2d');
+            sensitivityChart = new Chart(sensitivityCtx, {{
+                type: 'bar',
+                data: {{
+                    labels: elasticities.map(e => e.label),
+                    datasets: [{{
+                        label: 'Élasticité des revenus cumulés',
+                        data: elasticities.map(e => e.value),
+                        backgroundColor: elasticities.map(e => e.value >= 0 ? '#10b981' : '#ef4444')
+                    }}]
+                }},
+                options: {{
+                    indexAxis: 'y',
+                    responsive: true,
+                    scales: {{
+                        x: {{ title: {{ display: true, text: '% de variation pour +1% du paramètre' }} }}
+                    }},
+                    plugins: {{
+                        legend: {{ display: false }},
+                        title: {{ display: true, text: 'Sensibilité des Revenus Cumulés (Tornado)' }}
+                    }}
+                }}
+            }});
         }}
         
         // Initialisation
         updateSimulation();
+        whenVisible(SIMULATION_CHARTS, drawSimulationCharts);
     
     </script>
 </body>
 </html>
     """
+    return html_content
+
+# --- Export colonnaire (Arrow / Parquet) des résultats de chaque génération ---
+# pyarrow n'est importé que dans ces fonctions : optionnel, comme pour iter_hourly_grid.
+
+# Types fixés : les valeurs d'un run (ex. prix entier ou décimal selon l'API) ne
+# doivent pas changer le schéma d'un fichier à l'autre.
+EXPORT_RUN_FIELDS = (('france_btc_past', 'float64'), ('total_euros_past', 'int64'), ('price_eur', 'float64'),
+                     ('share', 'float64'), ('initial_current_block', 'int64'), ('total_mined_btc', 'float64'),
+                     ('initial_total_mw', 'float64'), ('A', 'float64'), ('exponent', 'float64'),
+                     ('fit_points', 'int64'), ('fit_residual_std', 'float64'))
+EXPORT_SERIES = ('hist_series', 'power_points', 'power_band_low', 'power_band_high')
+COMPACT_MIN_FILES = 8
+
+def _export_schemas():
+    """Schémas Arrow des tables 'runs' et 'series'."""
+    import pyarrow as pa
+    run_at = ('run_at', pa.timestamp('ms', tz='UTC'))
+    return {
+        'runs': pa.schema([run_at] + [(name, pa.type_for_alias(alias)) for name, alias in EXPORT_RUN_FIELDS]),
+        'series': pa.schema([run_at, ('t', pa.float64()), ('value', pa.float64())]),
+    }
+
+def _arrow_float64(values):
+    """Colonne Arrow float64 sur le buffer de `values` (array('d') ou memoryview), sans copie."""
+    import pyarrow as pa
+    return pa.Array.from_buffers(pa.float64(), len(values), [None, pa.py_buffer(values)])
+
+def export_run(result, root='exports', run_at=None):
+    """Ajoute le résultat d'une génération à un dataset Parquet partitionné (style Hive).
+
+    - <root>/runs/date=AAAA-MM-JJ/ : une ligne par génération (scalaires du résultat) ;
+    - <root>/series/series=<nom>/date=AAAA-MM-JJ/ : points (run_at, t, value) des séries,
+      t en secondes unix. Les colonnes t/value sont construites directement sur les
+      buffers des TimeSeries.
+    Lisible par pyarrow.dataset.dataset(<root>/runs, partitioning='hive') ou tout moteur
+    Parquet. Chaque appel écrit de petits fichiers part-<ns>-<aléa> (horodatage en
+    nanosecondes et suffixe aléatoire : deux générations dans la même seconde ne
+    s'écrasent pas) : voir compact_dataset.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schemas = _export_schemas()
+    run_at = int(run_at if run_at is not None else time.time())
+    day = datetime.fromtimestamp(run_at, timezone.utc).date().isoformat()
+    filename = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+    run_at_type = schemas['runs'].field('run_at').type
+
+    values = {name: (int if alias == 'int64' else float)(result[name]) for name, alias in EXPORT_RUN_FIELDS}
+    runs = pa.table({'run_at': [run_at * 1000], **{k: [v] for k, v in values.items()}}, schema=schemas['runs'])
+    runs_dir = os.path.join(root, 'runs', f"date={day}")
+    os.makedirs(runs_dir, exist_ok=True)
+    pq.write_table(runs, os.path.join(runs_dir, filename))
+
+    for series_name in EXPORT_SERIES:
+        series = result[series_name]
+        table = pa.Table.from_arrays([pa.array([run_at * 1000] * len(series), run_at_type),
+                                      _arrow_float64(series.t), _arrow_float64(series.v)],
+                                     schema=schemas['series'])
+        series_dir = os.path.join(root, 'series', f"series={series_name}", f"date={day}")
+        os.makedirs(series_dir, exist_ok=True)
+        pq.write_table(table, os.path.join(series_dir, filename))
+    return run_at
+
+def compact_dataset(root='exports', min_files=COMPACT_MIN_FILES, before=None):
+    """Fusionne les petits fichiers de chaque partition en un seul fichier.
+
+    Seules les partitions datées avant `before` (aujourd'hui par défaut, UTC) sont
+    compactées, pour ne pas croiser une génération en cours d'écriture ; une partition
+    n'est réécrite qu'à partir de `min_files` fichiers part-*. Les fichiers sont
+    convertis au schéma d'export avant fusion. Le résultat, compacted-<premier>-<dernier>,
+    est écrit sous un nom temporaire puis renommé avant la suppression des originaux ;
+    des part-* déjà couverts par un compacted-* (arrêt entre les deux) sont supprimés
+    au passage suivant au lieu d'être fusionnés une seconde fois, de même que les
+    compacted-*.tmp laissés par un arrêt pendant l'écriture.
+    Renvoie le nombre de partitions compactées.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schemas = _export_schemas()
+    before = before or datetime.now(timezone.utc).date().isoformat()
+    compacted = 0
+    for table_name, schema in schemas.items():
+        for dirpath, _, filenames in os.walk(os.path.join(root, table_name)):
+            partition = os.path.basename(dirpath)
+            if not partition.startswith('date=') or partition[5:] >= before:
+                continue
+            for f in filenames:
+                if f.startswith('compacted-') and f.endswith('.parquet.tmp'):
+                    os.remove(os.path.join(dirpath, f))  # Écriture interrompue
+            covered = [tuple(int(x) for x in f[len('compacted-'):-len('.parquet')].split('-'))
+                       for f in filenames if f.startswith('compacted-') and f.endswith('.parquet')]
+            parts = []
+            for f in filenames:
+                if not (f.startswith('part-') and f.endswith('.parquet')):
+                    continue
+                run_id = int(f[len('part-'):-len('.parquet')].split('-')[0])
+                if any(lo <= run_id <= hi for lo, hi in covered):
+                    os.remove(os.path.join(dirpath, f))  # Déjà fusionné par une compaction interrompue
+                else:
+                    parts.append((run_id, os.path.join(dirpath, f)))
+            if len(parts) < min_files:
+                continue
+            parts.sort()
+            table = pa.concat_tables([pq.ParquetFile(path).read().cast(schema) for _, path in parts])
+            target = os.path.join(dirpath, f"compacted-{parts[0][0]}-{parts[-1][0]}.parquet")
+            tmp = target + '.tmp'
+            pq.write_table(table, tmp)
+            os.replace(tmp, target)
+            for _, path in parts:
+                os.remove(path)
+            compacted += 1
+    return compacted
+
+def generate_html(source=None, snapshot=None, export_dir=None):
+    """Génère le fichier HTML avec mises à jour en temps réel via API.
+
+    Les données viennent de `snapshot` (DataSnapshot, ex. cache) ou sinon de `source`.
+    Avec `export_dir`, le résultat est aussi ajouté au dataset Parquet (export_run).
+    """
+    if snapshot is None:
+        snapshot = fetch_snapshot(source)
+    result = compute_opportunity_cost(snapshot)
+    html_content = render_html(result)
     
     with open('index.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
     
     print("Fichier index.html généré")
+    if export_dir:
+        export_run(result, export_dir)
+        compacted = compact_dataset(export_dir)
+        print(f"Résultats exportés dans {export_dir}" + (f" ({compacted} partitions compactées)" if compacted else ""))
+
+# --- Flux de prix continu : agrégation des ticks en barres OHLC ---
+
+TICK_BAR_S = 60
+TICK_HISTORY_BARS = 1440  # 24 h de barres d'une minute
+TICK_SMOOTHING_BARS = 5
+TICK_RECONNECT_S = 5
+
+class PriceBarAggregator:
+    """Agrège des ticks (timestamp s, prix EUR) en barres OHLC de durée fixe.
+
+    Mémoire bornée : les barres closes vont dans une deque de `history` éléments,
+    les plus anciennes étant écartées. Un tick arrivé en retard (antérieur à la
+    barre en cours, ou tombant dans une barre déjà close) est ignoré et compté
+    dans `late_ticks`. `on_bar(bar)` est
+    appelé à chaque clôture de barre.
+    """
+
+    def __init__(self, bar_seconds=TICK_BAR_S, history=TICK_HISTORY_BARS, on_bar=None):
+        self.bar_seconds = bar_seconds
+        self.bars = deque(maxlen=history)
+        self.current = None
+        self.late_ticks = 0
+        self.on_bar = on_bar
+
+    def add_tick(self, ts, price):
+        """Intègre un tick ; renvoie la barre close par ce tick, sinon None."""
+        start = ts - ts % self.bar_seconds
+        bar = self.current
+        # En retard : avant la barre en cours, ou dans/avant la dernière barre close (après close_due)
+        if (start < bar['start']) if bar is not None else (self.bars and start <= self.bars[-1]['start']):
+            self.late_ticks += 1
+            return None
+        if bar is not None and start == bar['start']:
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+            bar['ticks'] += 1
+            return None
+        closed = self._close() if bar is not None else None
+        self.current = {'start': start, 'open': price, 'high': price, 'low': price, 'close': price, 'ticks': 1}
+        return closed
+
+    def close_due(self, now):
+        """Clôt la barre en cours si sa période est écoulée (flux silencieux)."""
+        if self.current is not None and now >= self.current['start'] + self.bar_seconds:
+            return self._close()
+        return None
+
+    def _close(self):
+        bar, self.current = self.current, None
+        self.bars.append(bar)
+        if self.on_bar is not None:
+            self.on_bar(bar)
+        return bar
+
+    def latest_bar(self):
+        """Barre en cours, ou dernière barre close (None sans aucun tick)."""
+        if self.current is not None:
+            return self.current
+        return self.bars[-1] if self.bars else None
+
+    def recent_bars(self, count=None):
+        """Barres closes, de la plus ancienne à la plus récente (les `count` dernières)."""
+        bars = list(self.bars)
+        return bars if count is None else bars[-count:]
+
+    def smoothed_price(self, count=TICK_SMOOTHING_BARS):
+        """Moyenne des clôtures des `count` dernières barres (barre en cours comprise)."""
+        bars = list(self.bars)
+        if self.current is not None:
+            bars.append(self.current)
+        bars = bars[-count:]
+        if not bars:
+            return None
+        return sum(bar['close'] for bar in bars) / len(bars)
+
+    def close_series(self):
+        """Clôtures en TimeSeries (début de barre), barre en cours comprise."""
+        series = TimeSeries()
+        for bar in self.bars:
+            series.append(bar['start'], bar['close'])
+        if self.current is not None:
+            series.append(self.current['start'], self.current['close'])
+        return series
+
+class TickDataSource:
+    """Fournisseur de données dont le prix vient du flux de ticks agrégé.
+
+    Prix spot lissé sur les dernières barres ; l'historique de `fallback` est
+    prolongé par la dernière clôture de chaque jour plus récent. Hauteur et hash
+    rate, ainsi que le prix tant qu'aucun tick n'est reçu, viennent de `fallback`.
+    """
+
+    def __init__(self, aggregator, fallback=None):
+        self.aggregator = aggregator
+        self.fallback = fallback if fallback is not None else LiveDataSource()
+
+    def block_height(self):
+        return self.fallback.block_height()
+
+    def price_eur(self):
+        price = self.aggregator.smoothed_price()
+        return price if price is not None else self.fallback.price_eur()
+
+    def hash_rate_series(self):
+        return self.fallback.hash_rate_series()
+
+    def historical_prices(self, current_date):
+        hist = self.fallback.historical_prices(current_date)
+        series = hist.copy()  # La série du fallback reste intacte
+        for ts, close in self.aggregator.close_series().slice(series.t[-1] + 1 if len(series) else None):
+            if len(series) and time_bucket(ts, 'day') == time_bucket(series.t[-1], 'day'):
+                series.t[-1], series.v[-1] = ts, close  # Même jour : la clôture la plus récente l'emporte
+            else:
+                series.append(ts, close)
+        return series
+
+def parse_tick(line):
+    """Tick (timestamp s, prix) depuis une ligne JSON {"ts", "price"} ou « ts,prix ».
+
+    Timestamps en secondes ou millisecondes ; renvoie None si la ligne est illisible,
+    si une valeur n'est pas finie (« nan », « inf ») ou si le prix n'est pas positif.
+    """
+    try:
+        text = line.decode('utf-8') if isinstance(line, bytes) else line
+        text = text.strip()
+        if text.startswith('{'):
+            data = json.loads(text)
+            ts, price = float(data['ts']), float(data['price'])
+        else:
+            ts, price = (float(field) for field in text.split(','))
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not (math.isfinite(ts) and math.isfinite(price) and price > 0):
+        return None
+    if ts > 1e11:
+        ts /= 1000
+    return ts, price
+
+async def ingest_price_ticks(aggregator, host, port, reconnect_s=TICK_RECONNECT_S):
+    """Consomme un flux TCP de ticks (une ligne par tick) et alimente `aggregator`.
+
+    Reconnexion après `reconnect_s` secondes si le flux tombe ; si aucun tick
+    n'arrive pendant une durée de barre, la barre échue est close quand même.
+    """
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            try:
+                while True:
+                    try:
+                        line = await asyncio.wait_for(reader.readline(), aggregator.bar_seconds)
+                    except asyncio.TimeoutError:
+                        aggregator.close_due(time.time())
+                        continue
+                    if not line:
+                        raise ConnectionError("flux de ticks fermé")
+                    tick = parse_tick(line)
+                    if tick is not None:
+                        aggregator.add_tick(*tick)
+            finally:
+                writer.close()
+        except OSError as e:
+            print(f"Erreur flux de prix : {e}")
+        await asyncio.sleep(reconnect_s)
+
+# --- Mode serveur : page en mémoire + Server-Sent Events ---
+
+HEIGHT_POLL_S = 10  # Hauteur de bloc : détection rapide des nouveaux blocs
+PRICE_POLL_S = 60
+HASH_RATE_POLL_S = 600
+RENDER_INTERVAL_S = 6 * 3600  # Recalcul complet de la page (historique, loi de puissance)
+SSE_HEARTBEAT_S = 15
+
+class LiveState:
+    """Dernier état connu (hauteur, prix, MW) partagé par tous les clients SSE.
+
+    Chaque publication incrémente `version` et réveille tous les abonnés d'un
+    coup : une seule requête amont est diffusée à tous les navigateurs connectés.
+    """
+
+    def __init__(self, height, price, total_mw):
+        self.data = {'height': height, 'price': price, 'total_mw': total_mw}
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    def publish(self, **changes):
+        changes = {k: v for k, v in changes.items() if self.data.get(k) != v}
+        if not changes:
+            return
+        self.data.update(changes)
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, version, timeout):
+        """Attend une version plus récente que `version` (False si timeout)."""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def event(self):
+        return f"id: {self.version}\ndata: {json.dumps(self.data)}\n\n".encode()
+
+async def _poll(interval, fetch, on_value, label):
+    """Boucle d'interrogation d'une API amont (appel bloquant dans un thread)."""
+    while True:
+        try:
+            on_value(await asyncio.to_thread(fetch))
+        except Exception as e:
+            print(f"Erreur poller {label} : {e}")
+        await asyncio.sleep(interval)
+
+async def _rerender(page, source):
+    """Recalcule périodiquement la page servie (données historiques, régression)."""
+    while True:
+        await asyncio.sleep(RENDER_INTERVAL_S)
+        try:
+            result = await asyncio.to_thread(calculate_opportunity_cost, source=source)
+            page['html'] = render_html(result, live=True).encode('utf-8')
+        except Exception as e:
+            print(f"Erreur rendu : {e}")
+
+async def _handle_client(reader, writer, state, page):
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass  # En-têtes ignorés
+        parts = request_line.decode('latin-1').split()
+        path = parts[1].split('?')[0] if len(parts) >= 2 else ''
+        if path == '/events':
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+            version = state.version
+            writer.write(state.event())
+            await writer.drain()
+            while True:
+                if await state.wait(version, SSE_HEARTBEAT_S):
+                    version = state.version
+                    writer.write(state.event())
+                else:
+                    writer.write(b": ping\n\n")  # Garde la connexion ouverte derrière les proxys
+                await writer.drain()
+        if path in ('/', '/index.html'):
+            body, content_type = page['html'], 'text/html; charset=utf-8'
+            status = '200 OK'
+        elif path == '/state':
+            body, content_type = json.dumps(state.data).encode(), 'application/json'
+            status = '200 OK'
+        else:
+            body, content_type, status = b'Not found', 'text/plain', '404 Not Found'
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host='127.0.0.1', port=8000, source=None, tick_feed=None):
+    """Sert la page depuis la mémoire et pousse hauteur, prix et MW en SSE.
+
+    Avec `tick_feed` (hôte, port), le prix vient d'un flux de ticks agrégé en barres
+    OHLC (publié lissé à chaque clôture de barre) au lieu du polling de simple/price.
+    """
+    if source is None:
+        source = LiveDataSource()
+    # Les pollers lèvent les erreurs au lieu de publier des valeurs de fallback
+    strict_source = LiveDataSource(strict=True) if isinstance(source, LiveDataSource) else source
+    aggregator = None
+    if tick_feed is not None:
+        aggregator = PriceBarAggregator()
+        source = TickDataSource(aggregator, source)
+    result = await asyncio.to_thread(calculate_opportunity_cost, source=source)
+    page = {'html': render_html(result, live=True).encode('utf-8')}
+    state = LiveState(result['initial_current_block'], result['price_eur'], result['initial_total_mw'])
+
+    def on_height(height):
+        if height > state.data['height']:  # La hauteur ne recule jamais
+            state.publish(height=height)
+
+    tasks = [
+        asyncio.create_task(_poll(HEIGHT_POLL_S, strict_source.block_height, on_height, 'hauteur')),
+        asyncio.create_task(_poll(HASH_RATE_POLL_S, lambda: hash_rate_to_mw(strict_source.hash_rate_series().last()),
+                                  lambda mw: state.publish(total_mw=mw), 'hash rate')),
+        asyncio.create_task(_rerender(page, source)),
+    ]
+    if aggregator is not None:
+        aggregator.on_bar = lambda bar: state.publish(price=aggregator.smoothed_price())
+        tasks.append(asyncio.create_task(ingest_price_ticks(aggregator, *tick_feed)))
+    else:
+        tasks.append(asyncio.create_task(_poll(PRICE_POLL_S, strict_source.price_eur,
+                                               lambda price: state.publish(price=price), 'prix')))
+    server = await asyncio.start_server(lambda r, w: _handle_client(r, w, state, page), host, port,
+                                        backlog=4096)
+    print(f"Serveur sur http://{host}:{port} (SSE sur /events)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
 
 if __name__ == "__main__":
-    generate_html()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Compteur Bitcoin France")
+    parser.add_argument('mode', nargs='?', default='generate', choices=['generate', 'serve', 'dispatch', 'treasury'],
+                        help="generate : écrit index.html ; serve : serveur HTTP avec SSE ; "
+                             "dispatch : simulation horaire sur surplus (--grid-file) ; "
+                             "treasury : compare les stratégies de trésorerie")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tick-feed', help="serve : flux de ticks de prix hôte:port (une ligne JSON ou « ts,prix » par tick)")
+    parser.add_argument('--grid-file', help="CSV ou Parquet horaire : timestamp, surplus_mw, price_eur_mwh")
+    parser.add_argument('--capacities', default='150,500,1000,2000,3000',
+                        help="Capacités installées en MW, séparées par des virgules")
+    parser.add_argument('--btc-price', type=float, help="Prix BTC en EUR (défaut : prix actuel)")
+    parser.add_argument('--workers', type=int, help="treasury : nombre de processus (défaut : tous les cœurs si le calcul est long)")
+    parser.add_argument('--top', type=int, default=15, help="treasury : nombre de stratégies affichées")
+    parser.add_argument('--snapshot', help="generate, treasury : utilise ce DataSnapshot JSON en cache au lieu du réseau")
+    parser.add_argument('--export-dir', help="generate : ajoute le résultat au dataset Parquet partitionné (pyarrow)")
+    parser.add_argument('--save-snapshot', help="generate : enregistre les données récupérées (DataSnapshot JSON)")
+    args = parser.parse_args()
+    if args.mode == 'serve':
+        tick_feed = None
+        if args.tick_feed:
+            feed_host, _, feed_port = args.tick_feed.rpartition(':')
+            tick_feed = (feed_host or '127.0.0.1', int(feed_port))
+        asyncio.run(serve(args.host, args.port, tick_feed=tick_feed))
+    elif args.mode == 'dispatch':
+        if not args.grid_file:
+            parser.error("--grid-file est requis en mode dispatch")
+        capacities = [float(c) for c in args.capacities.split(',')]
+        btc_price = args.btc_price if args.btc_price is not None else get_btc_price_eur()
+        for row in simulate_dispatch(iter_hourly_grid(args.grid_file), capacities, btc_price):
+            print(f"{row['capacity_mw']:>7.0f} MW : {row['hours_run']:>7.0f} h, "
+                  f"{row['energy_mwh'] / 1e6:.2f} TWh, {row['btc_mined']:.1f} BTC, "
+                  f"marge nette {row['net_margin_eur'] / 1e6:.1f} M€")
+    elif args.mode == 'treasury':
+        snapshot = DataSnapshot.load(args.snapshot) if args.snapshot else fetch_snapshot()
+        results = evaluate_strategies(build_treasury_ledger(snapshot), workers=args.workers)
+        print(f"{len(results)} stratégies, prix spot {snapshot.price_eur:,.0f} €")
+        for row in results[:args.top]:
+            print(f"{row['value_eur'] / 1e6:>10.1f} M€  {row['btc_held']:>9.1f} BTC  "
+                  f"{row['cash_eur'] / 1e6:>9.1f} M€ cash  {row['label']}")
+    else:
+        snapshot = DataSnapshot.load(args.snapshot) if args.snapshot else fetch_snapshot()
+        if args.save_snapshot:
+            snapshot.save(args.save_snapshot)
+        generate_html(snapshot=snapshot, export_dir=args.export_dir)
\ No newline at end of file